@@ -5,14 +5,64 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate 
 from flask_jwt_extended import JWTManager 
 from config import Config
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, WatchedFileHandler, QueueHandler, QueueListener
 import os
+import queue
 
 db = SQLAlchemy() 
 migrate = Migrate() 
 jwt = JWTManager() 
 
+def configure_logging(app):
+    """
+    File logging lewat QueueHandler/QueueListener: thread request hanya memasukkan record ke queue,
+    sedangkan penulisan dan rotasi file dilakukan oleh satu thread listener di belakang.
+    """
+    if not os.path.exists('logs'):
+        os.mkdir('logs')
+    if app.config.get('LOG_FILE_ROTATION', 'size') == 'external':
+        # Beberapa proses (worker gunicorn) menulis ke file yang sama dengan mode append. Rotasi dilakukan di luar
+        # (logrotate) dan WatchedFileHandler membuka ulang file setelah dipindah; RotatingFileHandler per proses
+        # akan saling merotasi dan worker lain terus menulis ke file yang sudah di-rename.
+        file_handler = WatchedFileHandler('logs/regisync.log')
+    else:
+        file_handler = RotatingFileHandler('logs/regisync.log',
+                                           maxBytes=app.config.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024),
+                                           backupCount=app.config.get('LOG_FILE_BACKUP_COUNT', 10))
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    file_handler.setLevel(logging.INFO)
+
+    log_queue = queue.SimpleQueue()
+    app.extensions['log_queue'] = log_queue
+    app.extensions['log_handlers'] = (file_handler,)
+    start_log_listener(app)
+    atexit.register(stop_log_listener, app)
+
+    app.logger.addHandler(QueueHandler(log_queue))
+    app.logger.setLevel(logging.INFO)
+
+def start_log_listener(app):
+    """
+    Menjalankan thread listener log. Thread tidak ikut ter-fork, jadi fungsi ini dipanggil ulang
+    di setiap worker (lihat app/lifecycle.py).
+    """
+    listener = QueueListener(app.extensions['log_queue'], *app.extensions['log_handlers'],
+                             respect_handler_level=True)
+    listener.start()
+    app.extensions['log_listener'] = (os.getpid(), listener)
+
+def stop_log_listener(app):
+    """
+    Menghentikan listener setelah semua record yang masih di queue ditulis ke file.
+    Listener warisan proses induk (sebelum fork) diabaikan karena thread-nya tidak ada di proses ini.
+    """
+    pid, listener = app.extensions.pop('log_listener', (None, None))
+    if listener is not None and pid == os.getpid():
+        listener.stop()
+
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
@@ -22,18 +72,19 @@ def create_app(config_class=Config):
     jwt.init_app(app) 
 
     # Configure logging for the application
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-    file_handler = RotatingFileHandler('logs/regisync.log', maxBytes=10240,
-                                       backupCount=10)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(logging.INFO)
+    configure_logging(app)
+
+    from app.cli import register_cli
+    register_cli(app)
 
     with app.app_context():
         from . import models # Pastikan model diimpor di sini agar Alembic menemukannya
+
+        from app.services.response_cache_service import register_table_version_listener
+        register_table_version_listener()
+
+        from app.services.dedupe_service import register_dedupe_key_listener
+        register_dedupe_key_listener()
         
         from app.routes import init_services
         init_services(app) 
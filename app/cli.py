@@ -0,0 +1,182 @@
+import click
+from flask.cli import AppGroup
+
+# Perintah maintenance yang dijalankan lewat `flask <group> <command>` (mis. dari cron)
+logs_cli = AppGroup('logs', help='Maintenance tabel log_error.')
+
+
+@logs_cli.command('ensure-partitions')
+@click.option('--months-ahead', type=int, default=None, help='Jumlah bulan ke depan yang dibuatkan partisi.')
+def ensure_partitions_command(months_ahead):
+    """Membuat partisi bulanan log_error yang belum ada."""
+    from app.services.log_retention_service import LogRetentionService
+    created = LogRetentionService().ensure_partitions(months_ahead)
+    click.echo(f"Partisi tersedia: {', '.join(created)}")
+
+
+@logs_cli.command('prune')
+@click.option('--retention-months', type=int, default=None, help='Umur maksimum log (bulan) yang dipertahankan.')
+def prune_command(retention_months):
+    """Menyiapkan partisi (termasuk bulan yang tertampung di partisi default), lalu membuang yang kedaluwarsa."""
+    from app.services.log_retention_service import LogRetentionService
+    service = LogRetentionService()
+    # ensure dulu: baris lama di partisi default dipindah ke partisi bulanannya sehingga ikut di-prune
+    service.ensure_partitions()
+    dropped = service.prune(retention_months)
+    click.echo(f"{len(dropped)} partisi dihapus." if dropped else "Tidak ada partisi yang kedaluwarsa.")
+
+
+idempotency_cli = AppGroup('idempotency', help='Maintenance tabel idempotency_key.')
+
+
+@idempotency_cli.command('purge')
+@click.option('--batch-size', type=int, default=5000, help='Jumlah baris yang dihapus per transaksi.')
+def purge_idempotency_command(batch_size):
+    """Menghapus Idempotency-Key yang sudah melewati TTL."""
+    from app.utils.idempotency import purge_expired_idempotency_keys
+    deleted = purge_expired_idempotency_keys(batch_size)
+    click.echo(f"{deleted} idempotency key dihapus.")
+
+
+forms_cli = AppGroup('forms', help='Pengelolaan jawaban mentah Google Forms.')
+
+
+@forms_cli.command('promote')
+@click.argument('name', required=False)
+@click.argument('path', required=False)
+def promote_form_field_command(name, path):
+    """
+    Membuat kolom promosi form_<NAME> untuk jawaban di PATH (dipisah titik).
+    Tanpa argumen, semua field di PROMOTED_FORM_FIELDS dibuat.
+    """
+    from flask import current_app
+    from app.services.form_answer_service import FormAnswerService
+    service = FormAnswerService()
+    fields = {name: path} if name and path else current_app.config.get('PROMOTED_FORM_FIELDS') or {}
+    if not fields:
+        click.echo("Tidak ada field yang dipromosikan. Isi PROMOTED_FORM_FIELDS atau berikan NAME dan PATH.")
+        return
+    for field_name, field_path in fields.items():
+        service.promote_field(field_name, field_path)
+        click.echo(f"form_{field_name} <- {field_path}")
+
+
+dedupe_cli = AppGroup('dedupe', help='Deteksi pendaftaran ganda.')
+
+
+@dedupe_cli.command('scan')
+def dedupe_scan_command():
+    """Mengisi kunci normalisasi yang kosong lalu memperbarui daftar kandidat duplikat."""
+    from app.services.dedupe_service import DedupeService
+    result = DedupeService().scan()
+    click.echo(f"{result['candidates']} kandidat duplikat dari {result['compared_pairs']} pasangan.")
+
+
+reports_cli = AppGroup('reports', help='Tabel ringkasan laporan pasca-acara.')
+
+
+@reports_cli.command('refresh')
+@click.option('--full', is_flag=True, help='Hitung ulang semua bucket, bukan hanya yang berubah.')
+def refresh_reports_command(full):
+    """Me-refresh tabel ringkasan laporan (inkremental secara default)."""
+    from app.services.report_service import ReportService
+    result = ReportService().refresh(full=full)
+    if result is None:
+        click.echo("Refresh sedang dijalankan proses lain.")
+        return
+    for report_name, buckets in result.items():
+        click.echo(f"{report_name}: {buckets} bucket")
+
+
+archive_cli = AppGroup('archive', help='Arsip data acara yang sudah selesai.')
+
+
+@archive_cli.command('create')
+@click.argument('table', type=click.Choice(['peserta', 'log_error']))
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+              help='Arsipkan baris dengan waktu sebelum tanggal ini.')
+@click.option('--purge', is_flag=True, help='Hapus baris asli setelah arsip terverifikasi.')
+def create_archive_command(table, before, purge):
+    """Menulis baris lama ke file arsip terkompresi lalu memverifikasinya."""
+    from app.services.archive_service import ArchiveService
+    service = ArchiveService()
+    manifest = service.create(table, before)
+    click.echo(f"{manifest['id']}: {manifest['total_rows']} baris diarsipkan ({manifest['status']}).")
+    if purge:
+        manifest = service.purge(manifest['id'])
+        click.echo(f"{manifest['purged_rows']} baris dihapus dari {table}.")
+
+
+@archive_cli.command('verify')
+@click.argument('archive_id')
+def verify_archive_command(archive_id):
+    """Memeriksa ulang jumlah baris dan checksum arsip."""
+    from app.services.archive_service import ArchiveService
+    manifest = ArchiveService().verify(archive_id)
+    click.echo(f"{archive_id}: OK ({manifest['total_rows']} baris, status {manifest['status']}).")
+
+
+@archive_cli.command('purge')
+@click.argument('archive_id')
+def purge_archive_command(archive_id):
+    """Menghapus baris asli yang sudah diarsipkan, per batch."""
+    from app.services.archive_service import ArchiveService
+    manifest = ArchiveService().purge(archive_id)
+    click.echo(f"{manifest['purged_rows']} baris dihapus dari {manifest['table']}.")
+
+
+@archive_cli.command('restore')
+@click.argument('archive_id')
+def restore_archive_command(archive_id):
+    """Memasukkan kembali isi arsip ke tabel asal."""
+    from app.services.archive_service import ArchiveService
+    manifest = ArchiveService().restore(archive_id)
+    click.echo(f"{manifest['restored_rows']} baris dikembalikan ke {manifest['table']}.")
+
+
+@archive_cli.command('list')
+def list_archives_command():
+    """Menampilkan semua arsip beserta statusnya."""
+    from app.services.archive_service import ArchiveService
+    for manifest in ArchiveService().list_archives():
+        click.echo(f"{manifest['id']}\t{manifest['total_rows']}\t{manifest['status']}")
+
+
+attendance_cli = AppGroup('attendance', help='Maintenance data check-in.')
+
+
+@attendance_cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Menghitung ulang attendance_session_rollup dari attendance_event."""
+    from app.services.attendance_service import AttendanceService
+    sessions = AttendanceService().rebuild_rollups()
+    click.echo(f"Rollup dihitung ulang untuk {sessions} sesi.")
+
+
+mailout_cli = AppGroup('mailout', help='Mailout email konfirmasi.')
+
+
+@mailout_cli.command('confirmations')
+@click.option('--id', 'ids', multiple=True, help='Hanya kirim ke peserta ini (boleh diulang).')
+@click.option('--resend', is_flag=True, help='Kirim ulang meskipun peserta sudah ditandai terkirim.')
+def send_confirmations_command(ids, resend):
+    """Mengirim email konfirmasi ke peserta 'registered' yang belum dikirimi; aman dijalankan ulang."""
+    from app.services.mailout_service import ConfirmationMailout
+    mailout = ConfirmationMailout()
+    if resend:
+        click.echo(f"{mailout.reset(list(ids))} penanda terkirim dihapus.")
+    result = mailout.run(list(ids) or None)
+    progress = mailout.progress()
+    click.echo(f"{result['sent']} email terkirim, {result['failed']} gagal; "
+               f"{progress['pending']} dari {progress['registered']} peserta belum dikirimi.")
+
+
+def register_cli(app):
+    app.cli.add_command(logs_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(forms_cli)
+    app.cli.add_command(dedupe_cli)
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(attendance_cli)
+    app.cli.add_command(mailout_cli)
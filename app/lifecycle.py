@@ -0,0 +1,48 @@
+# Hook siklus hidup worker untuk server preforking (lihat gunicorn.conf.py)
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _dispose_engines(app, close):
+    from app import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+
+
+def init_worker(app):
+    """
+    Dipanggil di proses worker tepat setelah fork dari master yang sudah preload aplikasi.
+    Koneksi database, thread listener log, dan instance services milik master tidak boleh dipakai
+    bersama, jadi semuanya dibuat ulang di sini.
+    """
+    from app import start_log_listener
+    from app.routes import reset_services
+    from app.services.report_service import start_report_scheduler
+
+    # close=False: jangan menutup socket milik master, cukup lupakan koneksinya di worker ini
+    _dispose_engines(app, close=False)
+    start_log_listener(app)
+    with app.app_context():
+        reset_services(app)
+    start_report_scheduler(app)
+    logger.info("Worker initialized: database pools, log listener, services and report scheduler rebuilt.")
+
+
+def shutdown_worker(app):
+    """
+    Dipanggil saat worker berhenti (graceful): tulis semua log yang masih di queue,
+    lalu tutup koneksi database milik worker ini.
+    """
+    from app import stop_log_listener
+    from app.services.mailout_service import stop_mailout_worker
+    from app.services.report_service import stop_report_scheduler
+
+    logger.info("Worker shutting down: draining log queue and closing database pools.")
+    stop_report_scheduler(app)
+    # Mailout berhenti di batas batch; sisanya dikirim oleh mailout berikutnya
+    stop_mailout_worker(app)
+    stop_log_listener(app)
+    _dispose_engines(app, close=True)
@@ -1,4 +1,5 @@
-from app.__init__ import db # Sesuaikan import
+from app import db # Sesuaikan import
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 import uuid
 
@@ -11,13 +12,44 @@ class Peserta(db.Model):
     status_pendaftaran = db.Column(db.String(50), default='pending') # registered, pending, rejected
     status_kehadiran = db.Column(db.Boolean, default=False)
     qr_code_data = db.Column(db.String(255), unique=True, nullable=True) # Data untuk QR code, bisa berupa ID peserta
-    timestamp_registrasi = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp_registrasi = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     timestamp_kehadiran = db.Column(db.DateTime, nullable=True)
-    data_mentah_google_forms = db.Column(db.JSON, nullable=True)
+    timestamp_approval = db.Column(db.DateTime, nullable=True) # diisi saat status menjadi 'registered'
+    data_mentah_google_forms = db.Column(JSONB, nullable=True) # JSONB + index GIN agar bisa difilter (lihat form_answer_service)
+    # Dipakai untuk ETag endpoint admin; row_version naik di setiap UPDATE
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    row_version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                            onupdate=db.text('row_version + 1'))
+    # Kunci ternormalisasi untuk blocking deteksi duplikat (diisi otomatis, lihat dedupe_service)
+    email_key = db.Column(db.String(100), nullable=True, index=True)
+    phone_key = db.Column(db.String(20), nullable=True, index=True)
+    nama_key = db.Column(db.String(100), nullable=True, index=True)
+    confirmation_sent_at = db.Column(db.DateTime, nullable=True) # penanda mailout konfirmasi (lihat mailout_service)
+    confirmation_claimed_at = db.Column(db.DateTime, nullable=True) # lease batch mailout yang sedang dikirim
+
+    __table_args__ = (
+        db.Index('ix_peserta_form_answers_gin', 'data_mentah_google_forms', postgresql_using='gin',
+                 postgresql_ops={'data_mentah_google_forms': 'jsonb_path_ops'}),
+        # Partial index: mailout hanya mencari peserta 'registered' yang belum dikirimi email
+        db.Index('ix_peserta_confirmation_pending', 'id',
+                 postgresql_where=db.text("status_pendaftaran = 'registered' AND confirmation_sent_at IS NULL")),
+    )
 
     def __repr__(self):
         return f'<Peserta {self.nama} ({self.email})>'
 
+class PesertaQrImage(db.Model):
+    __tablename__ = 'peserta_qr_image'
+    # PNG QR yang dibuat sekali saat approval, dipakai ulang oleh mailout dan endpoint QR.
+    # Tabel terpisah agar listing peserta tidak ikut membaca blob.
+    peserta_id = db.Column(db.String(36), db.ForeignKey('peserta.id', ondelete='CASCADE'), primary_key=True)
+    qr_code_data = db.Column(db.String(255), nullable=False) # data yang di-encode; PNG dibuat ulang jika berbeda
+    png = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PesertaQrImage {self.peserta_id}>'
+
 class Admin(db.Model):
     __tablename__ = 'admin'
     id = db.Column(db.Integer, primary_key=True)
@@ -30,11 +62,126 @@ class Admin(db.Model):
 
 class LogError(db.Model):
     __tablename__ = 'log_error'
-    id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Tabel dipartisi per bulan berdasarkan timestamp (lihat migrasi), jadi timestamp ikut jadi bagian PK
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    timestamp = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
     message = db.Column(db.Text, nullable=False)
     level = db.Column(db.String(20), default='ERROR') # INFO, WARNING, ERROR, CRITICAL
     traceback = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        db.Index('ix_log_error_timestamp', 'timestamp'),
+        db.Index('ix_log_error_level_timestamp', 'level', 'timestamp'),
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
+
+    def __repr__(self):
+        return f'<LogError {self.timestamp} - {self.message[:50]}>'
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_version'
+    # Versi global per tabel, dinaikkan setiap ada penulisan (lihat app/services/response_cache_service.py)
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}={self.version}>'
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_key'
+    # sha256 dari (admin, method, path, header Idempotency-Key), jadi panjangnya selalu 64
+    key_hash = db.Column(db.String(64), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.SmallInteger, nullable=True) # NULL = request pertama masih diproses
+    content_type = db.Column(db.String(100), nullable=True)
+    response_body = db.Column(db.Text, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True) # lease singkat selama diproses, TTL penuh setelah selesai
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key_hash[:12]} ({self.status_code})>'
+
+class AttendanceEvent(db.Model):
+    __tablename__ = 'attendance_event'
+    # Append-only: satu baris per check-in peserta per sesi, tidak pernah di-UPDATE
+    id = db.Column(db.BigInteger, primary_key=True)
+    peserta_id = db.Column(db.String(36), db.ForeignKey('peserta.id', ondelete='CASCADE'), nullable=False)
+    session_id = db.Column(db.String(50), nullable=False)
+    scanner = db.Column(db.String(100), nullable=True)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Deteksi check-in ganda per sesi dilakukan oleh index unik ini
+        db.UniqueConstraint('peserta_id', 'session_id', name='uq_attendance_event_peserta_session'),
+        db.Index('ix_attendance_event_session_timestamp', 'session_id', 'timestamp'),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceEvent {self.peserta_id} @ {self.session_id}>'
+
+class AttendanceSessionRollup(db.Model):
+    __tablename__ = 'attendance_session_rollup'
+    # Ringkasan per sesi yang diperbarui secara inkremental setiap batch check-in
+    session_id = db.Column(db.String(50), primary_key=True)
+    total_check_ins = db.Column(db.BigInteger, nullable=False, default=0)
+    first_check_in = db.Column(db.DateTime, nullable=True)
+    last_check_in = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AttendanceSessionRollup {self.session_id}: {self.total_check_ins}>'
+
+class DuplicateCandidate(db.Model):
+    __tablename__ = 'duplicate_candidate'
+    # Pasangan peserta yang diduga duplikat; peserta_a_id < peserta_b_id agar setiap pasangan unik
+    id = db.Column(db.BigInteger, primary_key=True)
+    peserta_a_id = db.Column(db.String(36), db.ForeignKey('peserta.id', ondelete='CASCADE'), nullable=False)
+    peserta_b_id = db.Column(db.String(36), db.ForeignKey('peserta.id', ondelete='CASCADE'), nullable=False, index=True)
+    reasons = db.Column(db.String(50), nullable=False) # email, phone, nama (dipisah koma)
+    score = db.Column(db.Float, nullable=False) # rata-rata kemiripan nama dan kontak 0..1
+    status = db.Column(db.String(20), nullable=False, default='open') # open, dismissed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('peserta_a_id', 'peserta_b_id', name='uq_duplicate_candidate_pair'),
+        db.Index('ix_duplicate_candidate_status_score', 'status', 'score'),
+    )
+
+    def __repr__(self):
+        return f'<DuplicateCandidate {self.peserta_a_id} ~ {self.peserta_b_id} ({self.score:.2f})>'
+
+class ReportCheckInHourly(db.Model):
+    __tablename__ = 'report_check_in_hourly'
+    # Ringkasan check-in per sesi per jam, dihitung ulang per bucket oleh report_service
+    session_id = db.Column(db.String(50), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True) # awal jam
+    check_ins = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ReportCheckInHourly {self.session_id} {self.bucket}: {self.check_ins}>'
+
+class ReportRegistrationDaily(db.Model):
+    __tablename__ = 'report_registration_daily'
+    # Funnel pendaftaran per hari registrasi, dihitung ulang per bucket oleh report_service
+    day = db.Column(db.Date, primary_key=True)
+    registrations = db.Column(db.BigInteger, nullable=False, default=0)
+    pending = db.Column(db.BigInteger, nullable=False, default=0)
+    approved = db.Column(db.BigInteger, nullable=False, default=0)
+    rejected = db.Column(db.BigInteger, nullable=False, default=0)
+    attended = db.Column(db.BigInteger, nullable=False, default=0)
+    approval_lag_count = db.Column(db.BigInteger, nullable=False, default=0)
+    approval_lag_seconds_sum = db.Column(db.Float, nullable=False, default=0)
+    approval_lag_seconds_max = db.Column(db.Float, nullable=True)
+
+    def __repr__(self):
+        return f'<ReportRegistrationDaily {self.day}: {self.registrations}>'
+
+class ReportRefreshState(db.Model):
+    __tablename__ = 'report_refresh_state'
+    # Watermark refresh inkremental per laporan
+    report_name = db.Column(db.String(50), primary_key=True)
+    watermark_id = db.Column(db.BigInteger, nullable=True) # id attendance_event terakhir yang diproses
+    watermark_at = db.Column(db.DateTime, nullable=True) # updated_at peserta terakhir yang diproses
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+
     def __repr__(self):
-        return f'<LogError {self.timestamp} - {self.message[:50]}>'
\ No newline at end of file
+        return f'<ReportRefreshState {self.report_name} @ {self.refreshed_at}>'
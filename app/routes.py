@@ -1,16 +1,20 @@
-from flask import Blueprint, request, jsonify, current_app, send_file, url_for
-from app.__init__ import db # <<< PENTING: db diimpor dari app.__init__
+from flask import Blueprint, request, jsonify, current_app, send_file
+from app import db # <<< PENTING: db diimpor dari paket app (bukan app.__init__, yang membuat instance SQLAlchemy kedua)
 from app.models import Peserta, Admin, LogError # Model diimpor di sini
-from app.services.email_sms_service import EmailSMSService
-from app.services.qr_code_service import QRCodeService
-from app.services.auth_service import AuthService # Import AuthService
-from app.utils.helpers import log_error, handle_errors, generate_confirmation_message
+from app.services import LazyService
+from app.services.response_cache_service import get_table_version, query_fingerprint
+from app.services.form_answer_service import FormFilterError
+from app.services.dedupe_service import DedupeError
+from app.utils.helpers import log_error, handle_errors
+from app.utils.idempotency import idempotent
+from app.utils.validation import validate_peserta, validate_peserta_columns, records_to_columns
 from datetime import datetime
 from sqlalchemy import or_
 from sqlalchemy.future import select 
 import base64
 import io
 import logging
+import math
 import traceback
 from functools import wraps
 
@@ -22,30 +26,163 @@ bp = Blueprint('api', __name__)
 email_sms_service = None 
 qr_code_service = None 
 auth_service = None 
+rate_limit_service = None
+response_cache = None
+attendance_service = None
+form_answer_service = None
+dedupe_service = None
+request_profiler = None
+report_service = None
+archive_service = None
+
+def _build_auth_service():
+    from app.services.auth_service import AuthService
+    service = AuthService()
+    logger.info("AuthService initialized.")
+    return service
+
+def _build_email_sms_service(config):
+    from app.services.email_sms_service import EmailSMSService
+    return EmailSMSService(config)
+
+def _build_qr_code_service():
+    from app.services.qr_code_service import QRCodeService
+    service = QRCodeService()
+    logger.info("QRCodeService initialized.")
+    return service
+
+def _build_rate_limit_service(config):
+    from app.services.rate_limit_service import RateLimitService
+    return RateLimitService(config)
+
+def _build_response_cache(config):
+    from app.services.response_cache_service import ResponseCache
+    return ResponseCache(config)
+
+def _build_attendance_service():
+    from app.services.attendance_service import AttendanceService
+    service = AttendanceService()
+    logger.info("AttendanceService initialized.")
+    return service
+
+def _build_form_answer_service():
+    from app.services.form_answer_service import FormAnswerService
+    service = FormAnswerService()
+    logger.info("FormAnswerService initialized.")
+    return service
+
+def _build_dedupe_service():
+    from app.services.dedupe_service import DedupeService
+    service = DedupeService()
+    logger.info("DedupeService initialized.")
+    return service
+
+def _build_request_profiler(config):
+    from app.services.profiling_service import RequestProfiler
+    return RequestProfiler(config)
+
+def _build_report_service():
+    from app.services.report_service import ReportService
+    service = ReportService()
+    logger.info("ReportService initialized.")
+    return service
+
+def _build_archive_service():
+    from app.services.archive_service import ArchiveService
+    service = ArchiveService()
+    logger.info("ArchiveService initialized.")
+    return service
 
 def init_services(app_instance): 
     """
-    Inisialisasi services yang membutuhkan app context atau konfigurasi.
-    Dipanggil dari app/__init__.py
+    Mendaftarkan services yang membutuhkan app context atau konfigurasi.
+    Dipanggil dari app/__init__.py. Setiap service dibungkus LazyService sehingga modul
+    dan instance-nya baru dibuat saat pertama kali dipakai oleh request.
     """
-    global email_sms_service, qr_code_service, auth_service 
-    
-    # --- PERBAIKAN DI SINI ---
-    # Inisialisasi AuthService - TIDAK PERLU LAGI MENGIRIM 'db' INSTANCE
+    global email_sms_service, qr_code_service, auth_service, rate_limit_service, response_cache, attendance_service, form_answer_service
+    global dedupe_service, request_profiler, report_service, archive_service
+    config = app_instance.config
+
     if auth_service is None:
-        auth_service = AuthService() # <<< TIDAK ADA ARGUMEN 'db' LAGI
-        logger.info("AuthService initialized.")
-    # --- AKHIR PERBAIKAN ---
+        auth_service = LazyService(_build_auth_service)
 
-    # Inisialisasi EmailSMSService
     if email_sms_service is None:
-        email_sms_service = EmailSMSService(app_instance.config) 
-        logger.info("EmailSMSService initialized (SMS functionality removed).") 
+        email_sms_service = LazyService(lambda: _build_email_sms_service(config))
 
-    # Inisialisasi QRCodeService
     if qr_code_service is None:
-        qr_code_service = QRCodeService() 
-        logger.info("QRCodeService initialized.")
+        qr_code_service = LazyService(_build_qr_code_service)
+
+    # Throttling sebelum hashing password
+    if rate_limit_service is None:
+        rate_limit_service = LazyService(lambda: _build_rate_limit_service(config))
+
+    # Cache payload listing admin yang diinvalidasi oleh versi tabel
+    if response_cache is None:
+        response_cache = LazyService(lambda: _build_response_cache(config))
+
+    # Check-in per sesi
+    if attendance_service is None:
+        attendance_service = LazyService(_build_attendance_service)
+
+    # Filter jawaban Google Forms (JSONB)
+    if form_answer_service is None:
+        form_answer_service = LazyService(_build_form_answer_service)
+
+    # Deteksi & penggabungan pendaftaran ganda
+    if dedupe_service is None:
+        dedupe_service = LazyService(_build_dedupe_service)
+
+    # Profiling on-demand (header X-Profile pada endpoint admin)
+    if request_profiler is None:
+        request_profiler = LazyService(lambda: _build_request_profiler(config))
+
+    # Laporan dari tabel ringkasan
+    if report_service is None:
+        report_service = LazyService(_build_report_service)
+
+    # Arsip data acara (read-only lewat API)
+    if archive_service is None:
+        archive_service = LazyService(_build_archive_service)
+
+def reset_services(app_instance):
+    """
+    Membuang instance services yang ada lalu mendaftarkannya ulang. Dipanggil di setiap worker
+    setelah fork agar koneksi/pool milik proses induk tidak dipakai bersama.
+    """
+    global email_sms_service, qr_code_service, auth_service, rate_limit_service, response_cache, attendance_service, form_answer_service
+    global dedupe_service, request_profiler, report_service, archive_service
+    email_sms_service = qr_code_service = auth_service = None
+    rate_limit_service = response_cache = attendance_service = form_answer_service = None
+    dedupe_service = request_profiler = report_service = archive_service = None
+    init_services(app_instance)
+
+def throttle_auth(username=None):
+    """
+    Cek token bucket & lockout untuk IP klien dan username SEBELUM password di-hash.
+    Mengembalikan response 429 jika request harus ditolak, atau None jika boleh lanjut.
+    """
+    allowed, retry_after = rate_limit_service.check(request.remote_addr, username)
+    if allowed:
+        return None
+    response = jsonify({"message": "Too many authentication attempts, try again later"})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def etag_response(payload, etag):
+    """
+    Response JSON dengan ETag; client wajib revalidasi (If-None-Match) sebelum memakai salinannya.
+    """
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 # Dekorator untuk otentikasi admin (Basic Auth sederhana)
 def admin_required(f):
@@ -64,15 +201,60 @@ def admin_required(f):
             log_error(f"Invalid Authorization header format: {e}", level="WARNING")
             return jsonify({"message": "Invalid authorization header format"}), 401
 
+        throttled = throttle_auth(username)
+        if throttled:
+            return throttled
+
         admin = auth_service.authenticate_admin(username, password)
         if not admin:
+            rate_limit_service.record_failure(request.remote_addr, username)
             log_error(f"Unauthorized access attempt: Invalid credentials for user '{username}'.", level="WARNING")
             return jsonify({"message": "Invalid credentials"}), 401
+        rate_limit_service.record_success(request.remote_addr, username)
         
         request.admin = admin 
+        if 'X-Profile' in request.headers or '_profile' in request.args:
+            from app.services.profiling_service import profile_mode
+            mode = profile_mode(request.headers.get('X-Profile') or request.args.get('_profile'))
+            if mode:
+                return profile_request(f, args, kwargs, mode)
         return f(*args, **kwargs)
     return decorated_function
 
+def profile_request(f, args, kwargs, mode):
+    """
+    Menjalankan handler admin di bawah profiler (cProfile + SQL). Mode 'store' mengirim response asli dengan
+    header X-Profile-Id (hasil diambil dari /admin/profiles/<id> di worker yang sama). Mode 'json' dan 'pstats'
+    mengganti body dengan hasil profiling (file .prof untuk pstats), dan status asli dikirim di X-Profile-Status.
+    """
+    from app.services.profiling_service import ProfilerBusyError
+    try:
+        profile_id, response = request_profiler.run(
+            db.engine,
+            lambda: current_app.make_response(f(*args, **kwargs)),
+            f"{request.method} {request.full_path.rstrip('?')}",
+            request.admin.username
+        )
+    except ProfilerBusyError as e:
+        response = jsonify({"message": str(e)})
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+
+    if mode != 'store':
+        status_code = response.status_code
+        record = request_profiler.get(profile_id)
+        if mode == 'pstats':
+            response = send_file(io.BytesIO(request_profiler.dump_pstats(record)),
+                                 mimetype='application/octet-stream',
+                                 as_attachment=True,
+                                 download_name=f'profile-{profile_id}.prof')
+        else:
+            response = jsonify(request_profiler.to_json(record))
+        response.headers['X-Profile-Status'] = str(status_code)
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
 # Route untuk admin login
 @bp.route('/admin/login', methods=['POST'])
 @handle_errors
@@ -84,9 +266,15 @@ def admin_login():
     if not username or not password:
         return jsonify({"message": "Username and password are required"}), 400
 
+    throttled = throttle_auth(username)
+    if throttled:
+        return throttled
+
     admin = auth_service.authenticate_admin(username, password)
     if admin:
+        rate_limit_service.record_success(request.remote_addr, username)
         return jsonify({"message": "Login successful", "username": admin.username, "role": admin.role}), 200
+    rate_limit_service.record_failure(request.remote_addr, username)
     return jsonify({"message": "Invalid username or password"}), 401
 
 # Route untuk membuat admin baru (gunakan ini untuk setup awal)
@@ -101,11 +289,22 @@ def admin_register():
     if not username or not password:
         return jsonify({"message": "Username and password are required"}), 400
 
+    throttled = throttle_auth()
+    if throttled:
+        return throttled
+
     admin = auth_service.create_admin(username, password, role)
     if admin:
         return jsonify({"message": "Admin user created successfully"}), 201
     return jsonify({"message": "Admin user already exists"}), 409
 
+# Metrik limiter otentikasi
+@bp.route('/admin/rate-limit/metrics', methods=['GET'])
+@admin_required
+@handle_errors
+def get_rate_limit_metrics():
+    return jsonify(rate_limit_service.metrics()), 200
+
 # Otentikasi Peserta (cek status pendaftaran & kehadiran)
 @bp.route('/peserta/authenticate', methods=['POST'])
 @handle_errors
@@ -136,41 +335,110 @@ def authenticate_peserta():
 @bp.route('/peserta/check-in', methods=['POST'])
 @admin_required 
 @handle_errors
+@idempotent
 def check_in_peserta():
-    data = request.get_json()
+    """
+    Check-in per sesi. Body berisi `qr_data` (satu scan) atau `scans` (batch dari scanner,
+    list {"qr_data", "timestamp"}), ditambah `session` dan `scanner_id` opsional.
+    """
+    from app.services.attendance_service import SESSION_ID_MAX_LENGTH, SCANNER_MAX_LENGTH
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    # Divalidasi di sini: nilai yang salah tipe/terlalu panjang tidak boleh menggagalkan satu batch scan dengan 500
+    session_id = data.get('session') or current_app.config.get('DEFAULT_ATTENDANCE_SESSION', 'main')
+    if not isinstance(session_id, str) or not session_id.strip() or len(session_id.strip()) > SESSION_ID_MAX_LENGTH:
+        return jsonify({"message": f"session must be a non-empty string of at most {SESSION_ID_MAX_LENGTH} characters"}), 400
+    session_id = session_id.strip()
+    scanner = data.get('scanner_id') or request.admin.username
+    if not isinstance(scanner, str) or len(scanner) > SCANNER_MAX_LENGTH:
+        return jsonify({"message": f"scanner_id must be a string of at most {SCANNER_MAX_LENGTH} characters"}), 400
+
+    if 'scans' in data:
+        if not isinstance(data['scans'], list):
+            return jsonify({"message": "scans must be a list"}), 400
+        scans = []
+        for scan in data['scans']:
+            if not isinstance(scan, dict) or not isinstance(scan.get('qr_data'), str) or not scan['qr_data']:
+                return jsonify({"message": "Every scan requires qr_data"}), 400
+            try:
+                timestamp = datetime.fromisoformat(scan['timestamp']) if scan.get('timestamp') else None
+            except (TypeError, ValueError):
+                return jsonify({"message": f"Invalid timestamp for qr_data '{scan['qr_data']}'"}), 400
+            scans.append({"qr_data": scan['qr_data'], "timestamp": timestamp})
+        if not scans:
+            return jsonify({"message": "scans must not be empty"}), 400
+
+        results = attendance_service.record_check_ins(session_id, scanner, scans)
+        return jsonify({
+            "session": session_id,
+            "checked_in": sum(r["status"] == "checked_in" for r in results),
+            "results": [{
+                "qr_data": r["qr_data"],
+                "status": r["status"],
+                "id": r["peserta"].id if "peserta" in r else None,
+                "timestamp": r["timestamp"].isoformat() if "timestamp" in r else None
+            } for r in results]
+        }), 200
+
     qr_data = data.get('qr_data')
 
-    if not qr_data:
+    if not qr_data or not isinstance(qr_data, str):
         return jsonify({"message": "QR data is required"}), 400
 
-    # Menggunakan db.session.query()
-    peserta = db.session.query(Peserta).filter_by(qr_code_data=qr_data).first()
+    result = attendance_service.record_check_ins(session_id, scanner, [{"qr_data": qr_data}])[0]
+    peserta = result.get("peserta")
 
-    if peserta:
-        if peserta.status_pendaftaran == 'registered':
-            if not peserta.status_kehadiran:
-                peserta.status_kehadiran = True
-                peserta.timestamp_kehadiran = datetime.utcnow()
-                db.session.commit()
-                logger.info(f"Peserta '{peserta.email}' checked in.")
-                return jsonify({
-                    "message": "Check-in successful",
-                    "id": peserta.id,
-                    "nama": peserta.nama,
-                    "status_kehadiran": peserta.status_kehadiran,
-                    "timestamp_kehadiran": peserta.timestamp_kehadiran.isoformat()
-                }), 200
-            else:
-                return jsonify({"message": "Peserta already checked in", "id": peserta.id}), 409
-        else:
-            return jsonify({"message": "Peserta is not registered. Status: " + peserta.status_pendaftaran}), 403
+    if result["status"] == "checked_in":
+        logger.info(f"Peserta '{peserta.email}' checked in to session '{session_id}'.")
+        return jsonify({
+            "message": "Check-in successful",
+            "id": peserta.id,
+            "nama": peserta.nama,
+            "session": session_id,
+            "status_kehadiran": peserta.status_kehadiran,
+            "timestamp_kehadiran": result["timestamp"].isoformat()
+        }), 200
+    if result["status"] == "duplicate":
+        return jsonify({"message": "Peserta already checked in for this session", "id": peserta.id, "session": session_id}), 409
+    if result["status"] == "not_registered":
+        return jsonify({"message": "Peserta is not registered. Status: " + peserta.status_pendaftaran}), 403
     return jsonify({"message": "Peserta not found or invalid QR data"}), 404
 
+# Laporan kehadiran per sesi (dibaca dari rollup, tidak memindai attendance_event)
+@bp.route('/admin/attendance/sessions', methods=['GET'])
+@admin_required
+@handle_errors
+def get_attendance_sessions():
+    session_id = request.args.get('session', '').strip()
+    rollups = attendance_service.get_session_rollups(session_id or None)
+    return jsonify({
+        "data": [{
+            "session": r.session_id,
+            "total_check_ins": r.total_check_ins,
+            "first_check_in": r.first_check_in.isoformat() if r.first_check_in else None,
+            "last_check_in": r.last_check_in.isoformat() if r.last_check_in else None
+        } for r in rollups]
+    }), 200
+
 # Dashboard Admin: Get All Peserta
 @bp.route('/admin/peserta', methods=['GET'])
 @admin_required
 @handle_errors
 def get_all_peserta():
+    # ETag dari versi tabel peserta + fingerprint parameter; 304 dikirim tanpa menjalankan query utama
+    version = get_table_version(db.session, 'peserta')
+    fingerprint = query_fingerprint(request.args)
+    etag = f"peserta-list-{version}-{fingerprint}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    cache_key = ('peserta-list', fingerprint)
+    payload = response_cache.get(cache_key, version)
+    if payload is not None:
+        return etag_response(payload, etag)
+
     search_query = request.args.get('search', '').strip()
     status_pendaftaran = request.args.get('status_pendaftaran', '').strip().lower()
     status_kehadiran = request.args.get('status_kehadiran', '').strip().lower()
@@ -190,6 +458,10 @@ def get_all_peserta():
         query = query.filter_by(status_pendaftaran=status_pendaftaran)
     if status_kehadiran:
         query = query.filter_by(status_kehadiran=(status_kehadiran == 'true'))
+    try:
+        query = query.filter(*form_answer_service.build_filters(request.args))
+    except FormFilterError as e:
+        return jsonify({"message": str(e)}), 400
 
     paginated_pesertas = query.paginate(page=page, per_page=per_page, error_out=False)
     
@@ -207,23 +479,38 @@ def get_all_peserta():
             "qr_code_data": p.qr_code_data
         })
     
-    return jsonify({
+    payload = {
         "data": result,
         "total": paginated_pesertas.total,
         "page": paginated_pesertas.page,
         "per_page": paginated_pesertas.per_page,
         "pages": paginated_pesertas.pages
-    }), 200
+    }
+    response_cache.set(cache_key, version, payload)
+    return etag_response(payload, etag)
 
 # Dashboard Admin: Get Peserta by ID
 @bp.route('/admin/peserta/<peserta_id>', methods=['GET'])
 @admin_required
 @handle_errors
 def get_peserta_by_id(peserta_id):
+    # ETag dari row_version peserta; cukup membaca satu kolom sebelum memutuskan 304
+    row_version = db.session.query(Peserta.row_version).filter_by(id=peserta_id).scalar()
+    if row_version is None:
+        return jsonify({"message": "Peserta not found"}), 404
+    etag = f"peserta-{peserta_id}-{row_version}"
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+
+    cache_key = ('peserta-detail', peserta_id)
+    payload = response_cache.get(cache_key, row_version)
+    if payload is not None:
+        return etag_response(payload, etag)
+
     # Menggunakan db.session.query()
     peserta = db.session.query(Peserta).get(peserta_id)
     if peserta:
-        return jsonify({
+        payload = {
             "id": peserta.id,
             "nama": peserta.nama,
             "email": peserta.email,
@@ -234,7 +521,9 @@ def get_peserta_by_id(peserta_id):
             "timestamp_kehadiran": peserta.timestamp_kehadiran.isoformat() if peserta.timestamp_kehadiran else None,
             "qr_code_data": peserta.qr_code_data,
             "data_mentah_google_forms": peserta.data_mentah_google_forms 
-        }), 200
+        }
+        response_cache.set(cache_key, peserta.row_version, payload)
+        return etag_response(payload, f"peserta-{peserta_id}-{peserta.row_version}")
     return jsonify({"message": "Peserta not found"}), 404
 
 # Dashboard Admin: Edit Peserta Data
@@ -247,12 +536,22 @@ def edit_peserta_data(peserta_id):
     if not peserta:
         return jsonify({"message": "Peserta not found"}), 404
     
-    data = request.get_json()
-    peserta.nama = data.get('nama', peserta.nama)
-    peserta.email = data.get('email', peserta.email) 
-    peserta.nomor_telepon = data.get('nomor_telepon', peserta.nomor_telepon)
-    peserta.status_pendaftaran = data.get('status_pendaftaran', peserta.status_pendaftaran)
-    peserta.status_kehadiran = data.get('status_kehadiran', peserta.status_kehadiran)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    # Validasi sebelum menyentuh database, agar data buruk tidak berakhir sebagai constraint error saat commit
+    cleaned, errors = validate_peserta(data, partial=True)
+    if errors:
+        return jsonify({"message": "Invalid peserta data", "errors": errors}), 400
+    if 'email' in cleaned and cleaned['email'] != peserta.email and db.session.query(
+            db.session.query(Peserta.id).filter(Peserta.email == cleaned['email'], Peserta.id != peserta_id).exists()
+    ).scalar():
+        return jsonify({"message": "Email is already used by another peserta", "errors": {"email": "already in use"}}), 409
+
+    for field, value in cleaned.items():
+        setattr(peserta, field, value)
+    if peserta.status_pendaftaran == 'registered' and not peserta.timestamp_approval:
+        peserta.timestamp_approval = datetime.utcnow()
 
     try:
         db.session.commit()
@@ -263,11 +562,49 @@ def edit_peserta_data(peserta_id):
         log_error(f"Failed to update peserta '{peserta_id}': {e}", tb=traceback.format_exc())
         return jsonify({"message": "Failed to update peserta data", "error": str(e)}), 500
 
+# Validasi batch data peserta sebelum import (tidak menulis ke database)
+@bp.route('/admin/peserta/validate', methods=['POST'])
+@admin_required
+@handle_errors
+def validate_peserta_batch():
+    """
+    Body: {"records": [{...}, ...]} atau format kolom {"columns": {"nama": [...], "email": [...], ...}}.
+    Mengembalikan error per baris dalam satu pass, plus data yang sudah dinormalisasi (mis. telepon E.164).
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    if isinstance(data.get('records'), list):
+        columns = records_to_columns(data['records'])
+        total = len(data['records'])
+    elif isinstance(data.get('columns'), dict) and all(isinstance(v, list) for v in data['columns'].values()):
+        columns = data['columns']
+        total = max((len(values) for values in columns.values()), default=0)
+    else:
+        return jsonify({"message": "Provide 'records' (list of objects) or 'columns' (object of lists)"}), 400
+
+    try:
+        cleaned, errors = validate_peserta_columns(columns, partial=bool(data.get('partial')))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    invalid_rows = {error["row"] for error in errors}
+    return jsonify({
+        "total": total,
+        "valid": total - len(invalid_rows),
+        "invalid": len(invalid_rows),
+        "errors": errors,
+        "columns": cleaned
+    }), 200
+
 # Dashboard Admin: Approval Peserta (mengubah status_pendaftaran)
 @bp.route('/admin/peserta/<peserta_id>/approve', methods=['POST'])
 @admin_required
 @handle_errors
+@idempotent
 def approve_peserta(peserta_id):
+    from app.services.mailout_service import ConfirmationMailout, submit_mailout
+
     # Menggunakan db.session.query()
     peserta = db.session.query(Peserta).get(peserta_id)
     if not peserta:
@@ -275,28 +612,132 @@ def approve_peserta(peserta_id):
     
     if peserta.status_pendaftaran != 'registered':
         peserta.status_pendaftaran = 'registered'
+        peserta.timestamp_approval = datetime.utcnow()
         if not peserta.qr_code_data:
-            qr_data = str(peserta.id)
-            qr_code_bytes = qr_code_service.generate_qr_code(qr_data)
-            peserta.qr_code_data = qr_data
-            logger.info(f"QR code generated for approved peserta '{peserta.id}'.")
+            peserta.qr_code_data = str(peserta.id)
+        # QR dibuat sekali di sini dan disimpan; mailout memakai PNG yang sama, bukan merender ulang
+        ConfirmationMailout(qr_code_service=qr_code_service).qr_images([peserta])
+        logger.info(f"QR code generated for approved peserta '{peserta.id}'.")
             
         try:
             db.session.commit()
             logger.info(f"Peserta '{peserta_id}' approved by admin.")
-
-            if email_sms_service:
-                qr_code_url = url_for('api.get_peserta_qr_code', peserta_id=peserta.id, _external=True)
-                email_body = generate_confirmation_message(peserta, qr_code_url)
-                email_sms_service.send_email(peserta.email, "Pendaftaran RegiSync Anda Dikonfirmasi!", email_body)
-            
-            return jsonify({"message": "Peserta approved successfully", "status_pendaftaran": peserta.status_pendaftaran}), 200
         except Exception as e:
             db.session.rollback()
             log_error(f"Failed to approve peserta '{peserta_id}': {e}", tb=traceback.format_exc())
             return jsonify({"message": "Failed to approve peserta", "error": str(e)}), 500
+
+        # Email dikirim oleh thread mailout di background, jadi approval tidak menunggu SMTP
+        submit_mailout(current_app._get_current_object(), [peserta.id])
+        return jsonify({"message": "Peserta approved successfully", "status_pendaftaran": peserta.status_pendaftaran}), 200
     return jsonify({"message": "Peserta already registered"}), 409
 
+# Dashboard Admin: Kirim (ulang) email konfirmasi secara massal
+@bp.route('/admin/peserta/send-confirmations', methods=['POST'])
+@admin_required
+@handle_errors
+@idempotent
+def send_confirmation_emails():
+    """
+    Mengantrekan mailout konfirmasi untuk peserta 'registered' yang belum dikirimi email (atau `ids` tertentu)
+    lalu langsung mengembalikan 202. Dengan `resend: true`, penanda terkirim dihapus dulu sehingga email dikirim
+    ulang. Progres bisa dipantau dari GET endpoint yang sama; mailout besar sebaiknya dijalankan lewat
+    `flask mailout confirmations`.
+    """
+    from app.services.mailout_service import ConfirmationMailout, submit_mailout
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    ids = data.get('ids') or None
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, str) for i in ids)):
+        return jsonify({"message": "'ids' must be a list of peserta ids"}), 400
+
+    mailout = ConfirmationMailout()
+    reset = mailout.reset(ids) if data.get('resend') else 0
+    submit_mailout(current_app._get_current_object(), ids)
+    return jsonify({"message": "Confirmation mailout queued", "reset": reset, **mailout.progress()}), 202
+
+@bp.route('/admin/peserta/send-confirmations', methods=['GET'])
+@admin_required
+@handle_errors
+def get_confirmation_mailout_progress():
+    from app.services.mailout_service import ConfirmationMailout, mailout_running
+    return jsonify({**ConfirmationMailout().progress(),
+                    "running_in_this_worker": mailout_running(current_app._get_current_object())}), 200
+
+# Dashboard Admin: Kandidat pendaftaran ganda (diisi oleh `flask dedupe scan`)
+@bp.route('/admin/peserta/duplicates', methods=['GET'])
+@admin_required
+@handle_errors
+def get_duplicate_candidates():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    min_score = request.args.get('min_score', type=float)
+
+    paginated = dedupe_service.list_candidates(page, per_page, min_score)
+
+    def summary(p):
+        return {
+            "id": p.id,
+            "nama": p.nama,
+            "email": p.email,
+            "nomor_telepon": p.nomor_telepon,
+            "status_pendaftaran": p.status_pendaftaran,
+            "status_kehadiran": p.status_kehadiran,
+            "timestamp_registrasi": p.timestamp_registrasi.isoformat() if p.timestamp_registrasi else None
+        }
+
+    return jsonify({
+        "data": [{
+            "id": candidate.id,
+            "score": candidate.score,
+            "reasons": candidate.reasons.split(','),
+            "peserta_a": summary(peserta_a),
+            "peserta_b": summary(peserta_b)
+        } for candidate, peserta_a, peserta_b in paginated.items],
+        "total": paginated.total,
+        "page": paginated.page,
+        "per_page": paginated.per_page,
+        "pages": paginated.pages
+    }), 200
+
+@bp.route('/admin/peserta/duplicates/dismiss', methods=['POST'])
+@admin_required
+@handle_errors
+def dismiss_duplicate_candidates():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    candidate_ids = data.get('candidate_ids') or []
+    if (not isinstance(candidate_ids, list) or not candidate_ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in candidate_ids)):
+        return jsonify({"message": "'candidate_ids' must be a non-empty list of integers"}), 400
+    dismissed = dedupe_service.dismiss(candidate_ids)
+    logger.info(f"{dismissed} duplicate candidate(s) dismissed by admin.")
+    return jsonify({"message": "Duplicate candidates dismissed", "dismissed": dismissed}), 200
+
+# Dashboard Admin: Gabungkan peserta duplikat ({"merges": [{"keep_id": ..., "merge_id": ...}]})
+@bp.route('/admin/peserta/merge', methods=['POST'])
+@admin_required
+@handle_errors
+@idempotent
+def merge_peserta():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"message": "Request body must be a JSON object"}), 400
+    merges = data.get('merges') or []
+    if not isinstance(merges, list) or not merges or not all(
+            isinstance(m, dict) and isinstance(m.get('keep_id'), str) and isinstance(m.get('merge_id'), str)
+            for m in merges):
+        return jsonify({"message": "'merges' must be a non-empty list of {keep_id, merge_id}"}), 400
+    try:
+        merged = dedupe_service.merge([(m.get('keep_id'), m.get('merge_id')) for m in merges])
+    except DedupeError as e:
+        return jsonify({"message": str(e)}), 400
+    logger.info(f"{merged} peserta merged by admin.")
+    return jsonify({"message": "Peserta merged", "merged": merged, "skipped": len(merges) - merged}), 200
+
 # Dashboard Admin: Delete Peserta
 @bp.route('/admin/peserta/<peserta_id>', methods=['DELETE'])
 @admin_required
@@ -308,6 +749,8 @@ def delete_peserta(peserta_id):
         return jsonify({"message": "Peserta not found"}), 404
     
     try:
+        # Check-in dihapus lewat service (bukan CASCADE) agar rollup per sesi ikut dikurangi
+        attendance_service.remove_events([peserta.id])
         db.session.delete(peserta)
         db.session.commit()
         logger.info(f"Peserta '{peserta_id}' deleted by admin.")
@@ -339,6 +782,10 @@ def export_data():
         query = query.filter_by(status_pendaftaran=status_pendaftaran)
     if status_kehadiran:
         query = query.filter_by(status_kehadiran=(status_kehadiran == 'true'))
+    try:
+        query = query.filter(*form_answer_service.build_filters(request.args))
+    except FormFilterError as e:
+        return jsonify({"message": str(e)}), 400
 
     pesertas = query.all()
 
@@ -368,9 +815,27 @@ def export_data():
 def get_error_logs():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    
+    level = request.args.get('level', '').strip().upper()
+    since = request.args.get('since', '').strip()
+    until = request.args.get('until', '').strip()
+
+    try:
+        since_dt = datetime.fromisoformat(since) if since else None
+        until_dt = datetime.fromisoformat(until) if until else None
+    except ValueError:
+        return jsonify({"message": "Invalid 'since'/'until' format, use ISO 8601"}), 400
+
     # Menggunakan db.session.query()
-    logs_paginated = db.session.query(LogError).order_by(LogError.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    query = db.session.query(LogError)
+    # Filter rentang waktu pada kolom partisi (timestamp) agar Postgres hanya memindai partisi yang relevan
+    if since_dt:
+        query = query.filter(LogError.timestamp >= since_dt)
+    if until_dt:
+        query = query.filter(LogError.timestamp < until_dt)
+    if level:
+        query = query.filter(LogError.level == level)
+
+    logs_paginated = query.order_by(LogError.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
     
     result = []
     for log in logs_paginated.items:
@@ -389,6 +854,130 @@ def get_error_logs():
         "pages": logs_paginated.pages
     }), 200
 
+# Laporan pasca-acara dari tabel ringkasan (lihat app/services/report_service.py)
+def parse_report_range():
+    """Parameter since/until (ISO 8601) untuk endpoint laporan dan arsip; ValueError jika formatnya salah."""
+    since = request.args.get('since', '').strip()
+    until = request.args.get('until', '').strip()
+    return (datetime.fromisoformat(since) if since else None,
+            datetime.fromisoformat(until) if until else None)
+
+@bp.route('/admin/reports/check-ins', methods=['GET'])
+@admin_required
+@handle_errors
+def get_check_in_report():
+    from app.services.report_service import REPORT_CHECK_INS
+    try:
+        since_dt, until_dt = parse_report_range()
+    except ValueError:
+        return jsonify({"message": "Invalid 'since'/'until' format, use ISO 8601"}), 400
+
+    rows = report_service.get_check_ins(request.args.get('session', '').strip() or None, since_dt, until_dt)
+    return jsonify({
+        "data": [{
+            "session": r.session_id,
+            "hour": r.bucket.isoformat(),
+            "check_ins": r.check_ins
+        } for r in rows],
+        "total_check_ins": sum(r.check_ins for r in rows),
+        "freshness": report_service.freshness(REPORT_CHECK_INS)
+    }), 200
+
+@bp.route('/admin/reports/registrations', methods=['GET'])
+@admin_required
+@handle_errors
+def get_registration_report():
+    from app.services.report_service import REPORT_REGISTRATIONS
+    try:
+        since_dt, until_dt = parse_report_range()
+    except ValueError:
+        return jsonify({"message": "Invalid 'since'/'until' format, use ISO 8601"}), 400
+
+    rows = report_service.get_registrations(since_dt.date() if since_dt else None,
+                                            until_dt.date() if until_dt else None)
+    totals = {key: sum(getattr(r, key) for r in rows)
+              for key in ("registrations", "pending", "approved", "rejected", "attended", "approval_lag_count")}
+    lag_sum = sum(r.approval_lag_seconds_sum for r in rows)
+    lag_max = max((r.approval_lag_seconds_max for r in rows if r.approval_lag_seconds_max is not None), default=None)
+    totals.update({
+        "approval_lag_avg_seconds": round(lag_sum / totals["approval_lag_count"], 1) if totals["approval_lag_count"] else None,
+        "approval_lag_max_seconds": lag_max,
+        # Peserta yang sudah disetujui tetapi tidak pernah check-in
+        "no_show_rate": round(1 - totals["attended"] / totals["approved"], 4) if totals["approved"] else None
+    })
+    return jsonify({
+        "data": [{
+            "day": r.day.isoformat(),
+            "registrations": r.registrations,
+            "pending": r.pending,
+            "approved": r.approved,
+            "rejected": r.rejected,
+            "attended": r.attended,
+            "approval_lag_avg_seconds": round(r.approval_lag_seconds_sum / r.approval_lag_count, 1) if r.approval_lag_count else None,
+            "approval_lag_max_seconds": r.approval_lag_seconds_max
+        } for r in rows],
+        "totals": totals,
+        "freshness": report_service.freshness(REPORT_REGISTRATIONS)
+    }), 200
+
+# Arsip data acara (read-only; dibuat dan dikembalikan lewat `flask archive ...`)
+@bp.route('/admin/archives', methods=['GET'])
+@admin_required
+@handle_errors
+def get_archives():
+    return jsonify({"data": archive_service.list_archives()}), 200
+
+@bp.route('/admin/archives/<archive_id>/rows', methods=['GET'])
+@admin_required
+@handle_errors
+def get_archive_rows(archive_id):
+    from app.services.archive_service import ArchiveError
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    try:
+        since_dt, until_dt = parse_report_range()
+    except ValueError:
+        return jsonify({"message": "Invalid 'since'/'until' format, use ISO 8601"}), 400
+
+    try:
+        rows, total = archive_service.query(archive_id, page, per_page,
+                                            request.args.get('q', '').strip() or None, since_dt, until_dt)
+    except ArchiveError as e:
+        return jsonify({"message": str(e)}), 404
+    return jsonify({
+        "data": rows,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": math.ceil(total / per_page) if per_page else 0
+    }), 200
+
+# Hasil profiling request admin (ring buffer per worker)
+@bp.route('/admin/profiles', methods=['GET'])
+@admin_required
+@handle_errors
+def get_profiles():
+    return jsonify({
+        "data": [dict(p, started_at=p["started_at"].isoformat()) for p in request_profiler.list()]
+    }), 200
+
+@bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+@admin_required
+@handle_errors
+def get_profile(profile_id):
+    record = request_profiler.get(profile_id)
+    if not record:
+        return jsonify({"message": "Profile not found (it may have been evicted or recorded by another worker; "
+                                   "use 'X-Profile: json' or 'X-Profile: pstats' to get the result directly)"}), 404
+
+    if request.args.get('format') == 'pstats':
+        return send_file(io.BytesIO(request_profiler.dump_pstats(record)),
+                         mimetype='application/octet-stream',
+                         as_attachment=True,
+                         download_name=f'profile-{profile_id}.prof')
+
+    return jsonify(request_profiler.to_json(record)), 200
+
 # Endpoint untuk mendapatkan QR code sebagai gambar
 @bp.route('/peserta/<peserta_id>/qr', methods=['GET'])
 @handle_errors
@@ -399,7 +988,11 @@ def get_peserta_qr_code(peserta_id):
         logger.warning(f"QR code not found for participant ID: {peserta_id}")
         return jsonify({"message": "QR code not found for this participant"}), 404
     
-    qr_code_bytes = qr_code_service.generate_qr_code(peserta.qr_code_data)
+    from app.services.mailout_service import ConfirmationMailout
+    # PNG yang disimpan saat approval dipakai ulang; hanya dibuat (dan disimpan) jika belum ada
+    qr_code_bytes = ConfirmationMailout(qr_code_service=qr_code_service).qr_images([peserta]).get(peserta.id)
+    if db.session.new or db.session.dirty:
+        db.session.commit()
     
     if qr_code_bytes is None:
         return jsonify({"message": "Failed to generate QR code image"}), 500
@@ -0,0 +1,387 @@
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, delete, func, select, tuple_
+from flask import current_app
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Tabel yang boleh diarsipkan beserta kolom waktu yang menentukan batas arsip
+ARCHIVE_TABLES = {
+    'peserta': {'model': 'Peserta', 'time_column': 'timestamp_registrasi'},
+    'log_error': {'model': 'LogError', 'time_column': 'timestamp'},
+}
+ARCHIVE_ID_PATTERN = re.compile(r'^[a-z_]+-\d{8}-\d{14}$')
+MANIFEST_FILE = 'manifest.json'
+# Check-in peserta ikut diarsipkan sebagai kolom bersarang karena ikut terhapus (ON DELETE CASCADE)
+ATTENDANCE_COLUMN = 'attendance_events'
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def _checksum(columns, rows):
+    digest = hashlib.sha256(json.dumps(columns).encode('utf-8'))
+    for row in rows:
+        digest.update(json.dumps(row, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ArchiveService:
+    """
+    Memindahkan baris lama (peserta, log_error) ke file arsip terkompresi di ARCHIVE_DIR:
+    satu direktori per arsip berisi part-NNNNN.json.gz (format kolumnar: satu list nilai per kolom)
+    dan manifest.json (jumlah baris, sha256, rentang waktu per part, status).
+    Alur: create (tulis + verify) -> purge (hapus baris asli per batch) -> restore jika diperlukan.
+    """
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    def _config(self, name, default):
+        return current_app.config.get(name, default)
+
+    @property
+    def archive_dir(self):
+        return self._config('ARCHIVE_DIR', 'archive')
+
+    def _table(self, table_name):
+        from app import models
+        spec = ARCHIVE_TABLES.get(table_name)
+        if spec is None:
+            raise ArchiveError(f"Table '{table_name}' cannot be archived")
+        table = getattr(models, spec['model']).__table__
+        return table, table.c[spec['time_column']]
+
+    def _path(self, archive_id, *names):
+        if not ARCHIVE_ID_PATTERN.match(archive_id or ''):
+            raise ArchiveError(f"Invalid archive id '{archive_id}'")
+        return os.path.join(self.archive_dir, archive_id, *names)
+
+    def load_manifest(self, archive_id):
+        path = self._path(archive_id, MANIFEST_FILE)
+        if not os.path.exists(path):
+            raise ArchiveError(f"Archive '{archive_id}' not found")
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        path = self._path(manifest['id'], MANIFEST_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def list_archives(self):
+        if not os.path.isdir(self.archive_dir):
+            return []
+        manifests = []
+        for archive_id in sorted(os.listdir(self.archive_dir)):
+            if ARCHIVE_ID_PATTERN.match(archive_id) and os.path.exists(self._path(archive_id, MANIFEST_FILE)):
+                manifest = self.load_manifest(archive_id)
+                manifest.pop('parts', None)
+                manifests.append(manifest)
+        return manifests
+
+    def _read_part(self, archive_id, part):
+        with gzip.open(self._path(archive_id, part['file']), 'rt', encoding='utf-8') as f:
+            content = json.load(f)
+        columns = content['columns']
+        rows = [list(row) for row in zip(*(content['data'][name] for name in columns))]
+        return columns, rows
+
+    def _write_part(self, archive_id, number, columns, rows):
+        name = f"part-{number:05d}.json.gz"
+        content = {"columns": columns, "data": {name_: [row[i] for row in rows] for i, name_ in enumerate(columns)}}
+        with gzip.open(self._path(archive_id, name), 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(content, f, separators=(',', ':'), ensure_ascii=False)
+        return name
+
+    def _key_criteria(self, table, keys):
+        key_columns = list(table.primary_key.columns)
+        if len(key_columns) == 1:
+            return key_columns[0].in_([key[0] for key in keys])
+        return tuple_(*key_columns).in_(keys)
+
+    def _attendance_for(self, peserta_ids):
+        from app.models import AttendanceEvent
+        events = {}
+        rows = self.db.session.execute(
+            select(AttendanceEvent.peserta_id, AttendanceEvent.session_id, AttendanceEvent.scanner,
+                   AttendanceEvent.timestamp)
+            .where(AttendanceEvent.peserta_id.in_(peserta_ids))
+            .order_by(AttendanceEvent.id)
+        )
+        for peserta_id, session_id, scanner, timestamp in rows:
+            events.setdefault(peserta_id, []).append([session_id, scanner, _encode(timestamp)])
+        return events
+
+    def create(self, table_name, before, batch_size=None):
+        """
+        Menulis semua baris `table_name` dengan kolom waktu < `before` ke arsip baru, lalu memverifikasinya.
+        Baris asli belum dihapus; jalankan purge() setelah arsip terverifikasi.
+        """
+        table, time_column = self._table(table_name)
+        batch_size = batch_size or self._config('ARCHIVE_BATCH_SIZE', 10000)
+        archive_id = f"{table_name}-{before:%Y%m%d}-{datetime.utcnow():%Y%m%d%H%M%S}"
+        os.makedirs(self._path(archive_id), exist_ok=True)
+
+        key_columns = list(table.primary_key.columns)
+        columns = [column.name for column in table.columns]
+        if table_name == 'peserta':
+            columns.append(ATTENDANCE_COLUMN)
+        manifest = {
+            "id": archive_id,
+            "table": table_name,
+            "before": before.isoformat(),
+            "created_at": datetime.utcnow().isoformat(),
+            "columns": columns,
+            "key_columns": [column.name for column in key_columns],
+            "time_column": time_column.name,
+            "parts": [],
+            "total_rows": 0,
+            "status": 'writing',
+        }
+
+        last_key = None
+        while True:
+            query = select(table).where(time_column < before).order_by(*key_columns).limit(batch_size)
+            if last_key is not None:
+                query = query.where(tuple_(*key_columns) > tuple_(*last_key) if len(key_columns) > 1
+                                    else key_columns[0] > last_key[0])
+            records = self.db.session.execute(query).mappings().all()
+            if not records:
+                break
+            rows = [[_encode(record[column.name]) for column in table.columns] for record in records]
+            if table_name == 'peserta':
+                events = self._attendance_for([record['id'] for record in records])
+                for row, record in zip(rows, records):
+                    row.append(events.get(record['id'], []))
+
+            times = [record[time_column.name] for record in records if record[time_column.name] is not None]
+            name = self._write_part(archive_id, len(manifest['parts']) + 1, columns, rows)
+            manifest['parts'].append({
+                "file": name,
+                "rows": len(rows),
+                "sha256": _checksum(columns, rows),
+                "min_time": _encode(min(times)) if times else None,
+                "max_time": _encode(max(times)) if times else None,
+            })
+            manifest['total_rows'] += len(rows)
+            last_key = tuple(records[-1][column.name] for column in key_columns)
+            # Transaksi baca tidak dibiarkan terbuka selama file ditulis
+            self.db.session.rollback()
+
+        manifest['status'] = 'written'
+        self._save_manifest(manifest)
+        logger.info(f"Archive '{archive_id}' written: {manifest['total_rows']} row(s) in {len(manifest['parts'])} part(s).")
+        return self.verify(archive_id)
+
+    def verify(self, archive_id):
+        """
+        Membaca ulang setiap part: jumlah baris dan sha256 harus sama dengan manifest, dan (sebelum purge)
+        semua baris harus masih ada di tabel asal.
+        """
+        manifest = self.load_manifest(archive_id)
+        table, _ = self._table(manifest['table'])
+        key_indexes = [manifest['columns'].index(name) for name in manifest['key_columns']]
+        key_columns = [table.c[name] for name in manifest['key_columns']]
+
+        for part in manifest['parts']:
+            columns, rows = self._read_part(archive_id, part)
+            if len(rows) != part['rows'] or _checksum(columns, rows) != part['sha256']:
+                raise ArchiveError(f"Archive '{archive_id}' part {part['file']} failed row count/checksum verification")
+            if manifest['status'] in ('writing', 'written', 'verified'):
+                keys = [tuple(_decode(column, row[i]) for column, i in zip(key_columns, key_indexes)) for row in rows]
+                present = self.db.session.execute(
+                    select(func.count()).select_from(table).where(self._key_criteria(table, keys))
+                ).scalar()
+                if present != part['rows']:
+                    raise ArchiveError(f"Archive '{archive_id}' part {part['file']}: {present} of "
+                                       f"{part['rows']} row(s) still in '{manifest['table']}'")
+        self.db.session.rollback()
+
+        if manifest['status'] in ('writing', 'written'):
+            manifest['status'] = 'verified'
+            manifest['verified_at'] = datetime.utcnow().isoformat()
+            self._save_manifest(manifest)
+        logger.info(f"Archive '{archive_id}' verified.")
+        return manifest
+
+    def purge(self, archive_id, batch_size=None):
+        """
+        Menghapus baris asli yang sudah diarsipkan, ARCHIVE_DELETE_BATCH_SIZE baris per transaksi agar lock singkat.
+        Baris yang berubah sejak diarsipkan (row_version berbeda, atau untuk peserta: check-in yang berbeda dari
+        isi arsip) tidak dihapus.
+        """
+        from app.services.attendance_service import AttendanceService
+        from app.services.response_cache_service import VERSIONED_TABLES, bump_table_version
+        manifest = self.load_manifest(archive_id)
+        if manifest['status'] not in ('verified', 'purging'):
+            raise ArchiveError(f"Archive '{archive_id}' must be verified before purging (status: {manifest['status']})")
+        manifest['status'] = 'purging'
+        self._save_manifest(manifest)
+
+        table, _ = self._table(manifest['table'])
+        batch_size = batch_size or self._config('ARCHIVE_DELETE_BATCH_SIZE', 1000)
+        match_columns = list(manifest['key_columns'])
+        if 'row_version' in table.c:
+            match_columns.append('row_version')
+        match_indexes = [manifest['columns'].index(name) for name in match_columns]
+        match_table_columns = [table.c[name] for name in match_columns]
+
+        deleted = 0
+        for part in manifest['parts']:
+            columns, rows = self._read_part(archive_id, part)
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                keys = [tuple(_decode(column, row[i]) for column, i in zip(match_table_columns, match_indexes))
+                        for row in batch]
+                try:
+                    if ATTENDANCE_COLUMN in columns:
+                        keys = self._with_archived_attendance(table, match_table_columns, columns, batch, keys)
+                        # Check-in sudah ada di arsip; dihapus lewat service agar rollup per sesi ikut dikurangi
+                        AttendanceService().remove_events([key[match_columns.index('id')] for key in keys])
+                    if keys:
+                        result = self.db.session.execute(delete(table).where(tuple_(*match_table_columns).in_(keys)))
+                        deleted += result.rowcount
+                    if table.name in VERSIONED_TABLES:
+                        bump_table_version(self.db.session.connection(), table.name)
+                    self.db.session.commit()
+                except Exception:
+                    self.db.session.rollback()
+                    raise
+
+        skipped = manifest['total_rows'] - deleted
+        if skipped:
+            logger.warning(f"Archive '{archive_id}': {skipped} row(s) changed, checked in again or already removed, "
+                           f"not purged.")
+        manifest.update({"status": 'purged', "purged_at": datetime.utcnow().isoformat(), "purged_rows": deleted})
+        self._save_manifest(manifest)
+        logger.info(f"Archive '{archive_id}' purged {deleted} row(s) from '{manifest['table']}'.")
+        return manifest
+
+    def _with_archived_attendance(self, table, match_columns, columns, rows, keys):
+        """
+        Menyaring kunci peserta yang check-in-nya masih sama dengan isi arsip. Check-in sesi berikutnya tidak
+        mengubah baris peserta (row_version tetap), padahal event-nya ikut terhapus lewat ON DELETE CASCADE.
+        Baris peserta dikunci dulu (FOR UPDATE) sehingga check-in baru menunggu sampai batch ini selesai.
+        """
+        from app.models import AttendanceEvent
+        session = self.db.session
+        locked = set(session.execute(
+            select(table.c.id).where(tuple_(*match_columns).in_(keys)).with_for_update()
+        ).scalars())
+        current = {}
+        if locked:
+            for peserta_id, session_id in session.execute(
+                select(AttendanceEvent.peserta_id, AttendanceEvent.session_id)
+                .where(AttendanceEvent.peserta_id.in_(locked))
+            ):
+                current.setdefault(peserta_id, set()).add(session_id)
+
+        id_index, events_index = columns.index('id'), columns.index(ATTENDANCE_COLUMN)
+        # Satu event per (peserta, sesi), jadi himpunan sesi cukup untuk membandingkan isi arsip dengan tabel
+        return [key for row, key in zip(rows, keys)
+                if row[id_index] in locked
+                and current.get(row[id_index], set()) == {event[0] for event in row[events_index] or []}]
+
+    def restore(self, archive_id, batch_size=None):
+        """
+        Memasukkan kembali baris arsip ke tabel asal (baris yang sudah ada dilewati). Check-in peserta
+        dipulihkan lewat AttendanceService agar rollup per sesi ikut bertambah.
+        """
+        from sqlalchemy.dialects.postgresql import insert
+        from app.services.attendance_service import AttendanceService
+        from app.services.response_cache_service import VERSIONED_TABLES, bump_table_version
+        manifest = self.load_manifest(archive_id)
+        table, _ = self._table(manifest['table'])
+        batch_size = batch_size or self._config('ARCHIVE_BATCH_SIZE', 10000)
+
+        restored = 0
+        for part in manifest['parts']:
+            columns, rows = self._read_part(archive_id, part)
+            for start in range(0, len(rows), batch_size):
+                values, events = [], []
+                for row in rows[start:start + batch_size]:
+                    record = dict(zip(columns, row))
+                    for session_id, scanner, timestamp in record.pop(ATTENDANCE_COLUMN, None) or []:
+                        events.append({"peserta_id": record['id'], "session_id": session_id, "scanner": scanner,
+                                       "timestamp": datetime.fromisoformat(timestamp)})
+                    values.append({name: _decode(table.c[name], value) for name, value in record.items()})
+                try:
+                    inserted = self.db.session.execute(
+                        insert(table).values(values).on_conflict_do_nothing().returning(*table.primary_key.columns)
+                    ).all()
+                    if events:
+                        # Peserta yang dilewati (mis. email sudah dipakai peserta lain) tidak ikut dipulihkan
+                        # check-in-nya; rollup per sesi ditambah lagi setelah dikurangi saat purge
+                        inserted_ids = {row.id for row in inserted}
+                        AttendanceService().add_events([event for event in events
+                                                        if event['peserta_id'] in inserted_ids])
+                    if table.name in VERSIONED_TABLES:
+                        bump_table_version(self.db.session.connection(), table.name)
+                    self.db.session.commit()
+                except Exception:
+                    self.db.session.rollback()
+                    raise
+                restored += len(inserted)
+
+        manifest.update({"status": 'restored', "restored_at": datetime.utcnow().isoformat(),
+                         "restored_rows": restored})
+        self._save_manifest(manifest)
+        logger.info(f"Archive '{archive_id}' restored {restored} row(s) into '{manifest['table']}'.")
+        return manifest
+
+    def query(self, archive_id, page=1, per_page=20, search=None, since=None, until=None):
+        """
+        Query read-only atas isi arsip. Part yang rentang waktunya di luar since/until tidak dibaca.
+        Mengembalikan (rows, total).
+        """
+        manifest = self.load_manifest(archive_id)
+        table, _ = self._table(manifest['table'])
+        time_index = manifest['columns'].index(manifest['time_column'])
+        time_column = table.c[manifest['time_column']]
+        search = search.lower() if search else None
+        offset = (page - 1) * per_page
+
+        matched, total = [], 0
+        for part in manifest['parts']:
+            if since and part['max_time'] and datetime.fromisoformat(part['max_time']) < since:
+                continue
+            if until and part['min_time'] and datetime.fromisoformat(part['min_time']) >= until:
+                continue
+            columns, rows = self._read_part(archive_id, part)
+            for row in rows:
+                timestamp = _decode(time_column, row[time_index])
+                if since and (timestamp is None or timestamp < since):
+                    continue
+                if until and (timestamp is None or timestamp >= until):
+                    continue
+                if search and not any(isinstance(value, str) and search in value.lower() for value in row):
+                    continue
+                if offset <= total < offset + per_page:
+                    matched.append(dict(zip(columns, row)))
+                total += 1
+        return matched, total
@@ -0,0 +1,210 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from flask import current_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sesuai panjang kolom attendance_event di app/models.py
+SESSION_ID_MAX_LENGTH = 50
+SCANNER_MAX_LENGTH = 100
+
+
+class AttendanceService:
+    """
+    Mencatat check-in per sesi ke tabel append-only attendance_event dalam satu batch
+    (satu query lookup, satu INSERT ... ON CONFLICT DO NOTHING, satu upsert rollup).
+    """
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    def record_check_ins(self, session_id, scanner, scans):
+        """
+        `scans` adalah list dict {"qr_data": ..., "timestamp": datetime opsional}.
+        Mengembalikan list hasil dengan urutan yang sama; setiap hasil punya "status":
+        checked_in, duplicate, not_registered, atau not_found.
+        """
+        from app.models import Peserta, AttendanceEvent
+
+        qr_list = list({scan['qr_data'] for scan in scans})
+        pesertas = {
+            p.qr_code_data: p
+            for p in self.db.session.query(Peserta).filter(Peserta.qr_code_data.in_(qr_list)).all()
+        }
+
+        results = []
+        rows = {}
+        for scan in scans:
+            peserta = pesertas.get(scan['qr_data'])
+            if not peserta:
+                results.append({"qr_data": scan['qr_data'], "status": "not_found"})
+                continue
+            if peserta.status_pendaftaran != 'registered':
+                results.append({"qr_data": scan['qr_data'], "status": "not_registered", "peserta": peserta})
+                continue
+            timestamp = scan.get('timestamp') or datetime.utcnow()
+            # Scan ganda dalam batch yang sama cukup dicatat sekali
+            rows.setdefault(peserta.id, {
+                "peserta_id": peserta.id,
+                "session_id": session_id,
+                "scanner": scanner,
+                "timestamp": timestamp,
+            })
+            results.append({"qr_data": scan['qr_data'], "status": "pending", "peserta": peserta})
+
+        inserted = {}
+        try:
+            if rows:
+                stmt = insert(AttendanceEvent.__table__).values(list(rows.values()))
+                stmt = stmt.on_conflict_do_nothing(index_elements=['peserta_id', 'session_id'])
+                stmt = stmt.returning(AttendanceEvent.peserta_id, AttendanceEvent.timestamp)
+                inserted = dict(self.db.session.execute(stmt).all())
+
+            if inserted:
+                for peserta in pesertas.values():
+                    if peserta.id in inserted and not peserta.status_kehadiran:
+                        # Kolom lama tetap diisi dengan check-in pertama agar endpoint lain tidak berubah
+                        peserta.status_kehadiran = True
+                        peserta.timestamp_kehadiran = inserted[peserta.id]
+
+                self._add_to_rollups({session_id: list(inserted.values())})
+
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+        for result in results:
+            if result["status"] == "pending":
+                peserta_id = result["peserta"].id
+                if peserta_id in inserted:
+                    result["status"] = "checked_in"
+                    result["timestamp"] = inserted.pop(peserta_id)
+                else:
+                    result["status"] = "duplicate"
+
+        logger.info(f"Recorded {sum(r['status'] == 'checked_in' for r in results)} check-in(s) for session '{session_id}'.")
+        return results
+
+    def _add_to_rollups(self, timestamps_by_session):
+        """
+        Upsert rollup per sesi untuk event yang baru dimasukkan ({session_id: [timestamp, ...]}).
+        Pemanggil yang melakukan commit.
+        """
+        from app.models import AttendanceSessionRollup
+        table = AttendanceSessionRollup.__table__
+        now = datetime.utcnow()
+        for session_id, timestamps in timestamps_by_session.items():
+            if not timestamps:
+                continue
+            rollup = insert(table).values(
+                session_id=session_id,
+                total_check_ins=len(timestamps),
+                first_check_in=min(timestamps),
+                last_check_in=max(timestamps),
+                updated_at=now,
+            )
+            rollup = rollup.on_conflict_do_update(
+                index_elements=['session_id'],
+                set_={
+                    "total_check_ins": table.c.total_check_ins + len(timestamps),
+                    "first_check_in": func.least(table.c.first_check_in, rollup.excluded.first_check_in),
+                    "last_check_in": func.greatest(table.c.last_check_in, rollup.excluded.last_check_in),
+                    "updated_at": rollup.excluded.updated_at,
+                }
+            )
+            self.db.session.execute(rollup)
+
+    def add_events(self, events):
+        """
+        Memasukkan kembali event check-in apa adanya (dipakai restore arsip) dan menambahkan yang benar-benar
+        masuk ke rollup per sesi; event yang sudah ada dilewati. Pemanggil yang melakukan commit.
+        Mengembalikan jumlah event yang dimasukkan.
+        """
+        from app.models import AttendanceEvent
+        if not events:
+            return 0
+        table = AttendanceEvent.__table__
+        stmt = insert(table).values(events).on_conflict_do_nothing(index_elements=['peserta_id', 'session_id'])
+        inserted = self.db.session.execute(stmt.returning(table.c.session_id, table.c.timestamp)).all()
+        timestamps_by_session = {}
+        for session_id, timestamp in inserted:
+            timestamps_by_session.setdefault(session_id, []).append(timestamp)
+        self._add_to_rollups(timestamps_by_session)
+        return len(inserted)
+
+    def remove_events(self, peserta_ids):
+        """
+        Menghapus check-in milik peserta yang akan dihapus dan mengoreksi rollup per sesi (total dikurangi,
+        first/last dihitung ulang dari index session_id+timestamp). Harus dipanggil sebelum peserta dihapus,
+        karena ON DELETE CASCADE menghapus event tanpa menyentuh rollup. Pemanggil yang melakukan commit.
+        """
+        from app.models import AttendanceEvent
+        if not peserta_ids:
+            return {}
+        return self._remove(AttendanceEvent.__table__.c.peserta_id.in_(list(peserta_ids)))
+
+    def remove_events_by_id(self, event_ids):
+        """
+        Seperti remove_events, tetapi per id event (mis. check-in ganda yang dibuang saat merge peserta).
+        """
+        from app.models import AttendanceEvent
+        if not event_ids:
+            return {}
+        return self._remove(AttendanceEvent.__table__.c.id.in_(list(event_ids)))
+
+    def _remove(self, criterion):
+        from app.models import AttendanceEvent, AttendanceSessionRollup
+        session = self.db.session
+        events = AttendanceEvent.__table__
+        removed = Counter(session.execute(delete(events).where(criterion).returning(events.c.session_id)).scalars())
+
+        rollup = AttendanceSessionRollup.__table__
+        for session_id, count in removed.items():
+            session.execute(update(rollup).where(rollup.c.session_id == session_id).values(
+                total_check_ins=rollup.c.total_check_ins - count,
+                first_check_in=select(func.min(events.c.timestamp)).where(events.c.session_id == session_id)
+                .scalar_subquery(),
+                last_check_in=select(func.max(events.c.timestamp)).where(events.c.session_id == session_id)
+                .scalar_subquery(),
+                updated_at=datetime.utcnow(),
+            ))
+        if removed:
+            # Sesi tanpa check-in tersisa dibuang, sama seperti hasil rebuild_rollups
+            session.execute(delete(rollup).where(rollup.c.session_id.in_(list(removed)), rollup.c.total_check_ins <= 0))
+        return dict(removed)
+
+    def rebuild_rollups(self):
+        """
+        Menghitung ulang seluruh attendance_session_rollup dari attendance_event (untuk memperbaiki drift,
+        mis. setelah event dihapus dengan SQL manual). Mengembalikan jumlah sesi.
+        """
+        from app.models import AttendanceEvent, AttendanceSessionRollup
+        session = self.db.session
+        rollup = AttendanceSessionRollup.__table__
+        try:
+            session.execute(delete(rollup))
+            session.execute(rollup.insert().from_select(
+                ['session_id', 'total_check_ins', 'first_check_in', 'last_check_in', 'updated_at'],
+                select(AttendanceEvent.session_id, func.count(), func.min(AttendanceEvent.timestamp),
+                       func.max(AttendanceEvent.timestamp), func.now())
+                .group_by(AttendanceEvent.session_id)
+            ))
+            sessions = session.query(func.count()).select_from(rollup).scalar()
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        logger.info(f"Rebuilt attendance rollups for {sessions} session(s).")
+        return sessions
+
+    def get_session_rollups(self, session_id=None):
+        from app.models import AttendanceSessionRollup
+        query = self.db.session.query(AttendanceSessionRollup)
+        if session_id:
+            query = query.filter_by(session_id=session_id)
+        return query.order_by(AttendanceSessionRollup.session_id).all()
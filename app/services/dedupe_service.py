@@ -0,0 +1,383 @@
+from datetime import datetime
+from itertools import combinations, groupby
+from operator import itemgetter
+from sqlalchemy import bindparam, delete, event, func, inspect, select, update
+from flask import current_app
+import logging
+import time
+
+from app.utils.normalize import normalize_email_key, normalize_phone, normalize_nama_key
+
+logger = logging.getLogger(__name__)
+
+KEY_SOURCE_ATTRIBUTES = ('email', 'nomor_telepon', 'nama')
+# Saat menggabungkan, status pendaftaran yang "lebih jauh" yang dipertahankan
+STATUS_RANK = {'rejected': 0, 'pending': 1, 'registered': 2}
+
+
+# Skor kontak untuk email/telepon yang hampir sama (lihat DedupeService.contact_similarity)
+NEAR_CONTACT_SCORE = 0.9
+
+
+class DedupeError(ValueError):
+    pass
+
+
+def _within_one_edit(a, b):
+    """
+    True jika a dan b berbeda paling banyak satu sisipan, hapus, atau ganti karakter.
+    """
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def peserta_keys(nama, email, nomor_telepon):
+    return {
+        "email_key": normalize_email_key(email),
+        "phone_key": normalize_phone(nomor_telepon),
+        "nama_key": normalize_nama_key(nama),
+    }
+
+
+def _set_peserta_keys(mapper, connection, target):
+    state = inspect(target)
+    if state.persistent and not any(state.attrs[name].history.has_changes() for name in KEY_SOURCE_ATTRIBUTES):
+        return
+    for column, value in peserta_keys(target.nama, target.email, target.nomor_telepon).items():
+        setattr(target, column, value)
+
+
+def register_dedupe_key_listener():
+    """
+    Mengisi email_key/phone_key/nama_key setiap kali peserta dibuat atau nama/email/telepon-nya diubah lewat ORM.
+    Baris yang ditulis di luar ORM diisi oleh `flask dedupe scan` (backfill_keys).
+    """
+    from app.models import Peserta
+    for name in ('before_insert', 'before_update'):
+        if not event.contains(Peserta, name, _set_peserta_keys):
+            event.listen(Peserta, name, _set_peserta_keys)
+
+
+class DedupeService:
+    """
+    Deteksi pendaftaran ganda dengan blocking: hanya peserta yang berbagi email_key, phone_key, atau
+    nama_key yang dibandingkan, jadi jumlah perbandingan mengikuti jumlah duplikat, bukan n².
+    """
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    def _config(self, name, default):
+        return current_app.config.get(name, default)
+
+    @staticmethod
+    def name_similarity(nama_key_a, nama_key_b):
+        from difflib import SequenceMatcher
+        if not nama_key_a or not nama_key_b:
+            return 0.0
+        return SequenceMatcher(None, nama_key_a, nama_key_b).ratio()
+
+    @staticmethod
+    def contact_similarity(email_key_a, email_key_b, phone_key_a, phone_key_b):
+        """
+        Sinyal kontak untuk pasangan kandidat: 1.0 jika email_key atau phone_key sama, 0.9 jika hanya beda
+        sedikit (local-part email sama di domain lain, email salah ketik satu karakter, atau telepon beda
+        satu digit), selain itu 0.0. Kemiripan kabur (SequenceMatcher) sengaja tidak dipakai di sini: email
+        orang berbeda dengan nama umum sering mirip (budi.santoso88@ vs budisantoso@) dan tidak menambah bukti.
+        """
+        if (email_key_a and email_key_a == email_key_b) or (phone_key_a and phone_key_a == phone_key_b):
+            return 1.0
+        if email_key_a and email_key_b:
+            if email_key_a.split('@')[0] == email_key_b.split('@')[0] or _within_one_edit(email_key_a, email_key_b):
+                return NEAR_CONTACT_SCORE
+        if phone_key_a and phone_key_b and len(phone_key_a) == len(phone_key_b) \
+                and sum(a != b for a, b in zip(phone_key_a, phone_key_b)) <= 1:
+            return NEAR_CONTACT_SCORE
+        return 0.0
+
+    def backfill_keys(self, batch_size=None):
+        """
+        Mengisi kunci untuk baris yang belum punya email_key (data lama / ditulis dengan SQL mentah).
+        """
+        from app.models import Peserta
+        batch_size = batch_size or self._config('DEDUPE_BATCH_SIZE', 5000)
+        table = Peserta.__table__
+        stmt = update(table).where(table.c.id == bindparam('b_id')).values(
+            email_key=bindparam('b_email_key'),
+            phone_key=bindparam('b_phone_key'),
+            nama_key=bindparam('b_nama_key'),
+            # Kunci bukan perubahan data peserta: nilai lama ditulis ulang agar onupdate tidak terpicu (ETag tetap)
+            row_version=table.c.row_version,
+            updated_at=table.c.updated_at,
+        )
+
+        total, last_id = 0, ''
+        while True:
+            rows = self.db.session.execute(
+                select(table.c.id, table.c.nama, table.c.email, table.c.nomor_telepon)
+                .where(table.c.email_key.is_(None), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                keys = peserta_keys(row.nama, row.email, row.nomor_telepon)
+                params.append({"b_id": row.id, **{f"b_{column}": value for column, value in keys.items()}})
+            try:
+                self.db.session.execute(stmt, params)
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+            total += len(rows)
+            last_id = rows[-1].id
+        if total:
+            logger.info(f"Backfilled dedupe keys for {total} peserta.")
+        return total
+
+    def _blocks(self, key_column):
+        """
+        Menghasilkan list (id, nama_key, email_key, phone_key) per nilai kunci yang dimiliki lebih dari satu peserta.
+        """
+        from app.models import Peserta
+        max_block = self._config('DEDUPE_MAX_BLOCK_SIZE', 50)
+        duplicated_keys = (
+            select(key_column).where(key_column.isnot(None))
+            .group_by(key_column).having(func.count() > 1)
+        )
+        rows = self.db.session.execute(
+            select(key_column, Peserta.id, Peserta.nama_key, Peserta.email_key, Peserta.phone_key)
+            .where(key_column.in_(duplicated_keys))
+            .order_by(key_column)
+            .execution_options(yield_per=self._config('DEDUPE_BATCH_SIZE', 5000))
+        )
+        for key, group in groupby(rows, key=itemgetter(0)):
+            members = [tuple(row[1:]) for row in group]
+            if len(members) > max_block:
+                # Mis. nomor placeholder '000000' yang dipakai banyak orang: tidak bermakna sebagai blok
+                logger.warning(f"Skipping dedupe block {key_column.key}='{key}' with {len(members)} members.")
+                continue
+            yield members
+
+    def scan(self):
+        """
+        Backfill kunci, bangun pasangan kandidat dari tiap blok, beri skor, lalu upsert ke duplicate_candidate.
+        Skor = rata-rata kemiripan nama dan sinyal kontak (email/telepon), sehingga nama yang sama saja tidak
+        menghasilkan kandidat. Pasangan yang sudah di-dismiss tidak dibuka kembali; kandidat 'open' yang
+        tidak muncul lagi di scan ini dihapus.
+        """
+        from app.models import Peserta
+        started = time.monotonic()
+        self.backfill_keys()
+
+        pairs = {}
+        for reason, key_column in (('email', Peserta.email_key), ('phone', Peserta.phone_key),
+                                   ('nama', Peserta.nama_key)):
+            for members in self._blocks(key_column):
+                for member_a, member_b in combinations(sorted(members), 2):
+                    pair = pairs.setdefault((member_a[0], member_b[0]), [set(), member_a, member_b])
+                    pair[0].add(reason)
+
+        min_score = self._config('DEDUPE_MIN_NAME_SCORE', 0.85)
+        now = datetime.utcnow()
+        candidates = []
+        for (id_a, id_b), (reasons, (_, nama_a, email_a, phone_a), (_, nama_b, email_b, phone_b)) in pairs.items():
+            name_score = self.name_similarity(nama_a, nama_b)
+            contact_score = self.contact_similarity(email_a, email_b, phone_a, phone_b)
+            # Email yang sama setelah normalisasi hampir pasti orang yang sama; telepon yang sama butuh nama mirip;
+            # nama yang sama (nama umum bisa dipakai banyak orang) butuh kontak yang mirip sebagai sinyal kedua
+            if 'email' in reasons:
+                matched = True
+            elif 'phone' in reasons:
+                matched = name_score >= min_score
+            else:
+                matched = contact_score >= NEAR_CONTACT_SCORE
+            if matched:
+                candidates.append({
+                    "peserta_a_id": id_a,
+                    "peserta_b_id": id_b,
+                    "reasons": ','.join(sorted(reasons)),
+                    "score": round((name_score + contact_score) / 2, 4),
+                    "status": 'open',
+                    "updated_at": now,
+                })
+
+        self._upsert_candidates(candidates, now)
+        logger.info(f"Dedupe scan compared {len(pairs)} pair(s), {len(candidates)} candidate(s) "
+                    f"in {time.monotonic() - started:.1f}s.")
+        return {"compared_pairs": len(pairs), "candidates": len(candidates)}
+
+    def _upsert_candidates(self, candidates, scanned_at):
+        from sqlalchemy.dialects.postgresql import insert
+        from app.models import DuplicateCandidate
+        table = DuplicateCandidate.__table__
+        batch_size = self._config('DEDUPE_BATCH_SIZE', 5000)
+        try:
+            for start in range(0, len(candidates), batch_size):
+                stmt = insert(table).values(candidates[start:start + batch_size])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['peserta_a_id', 'peserta_b_id'],
+                    set_={
+                        "reasons": stmt.excluded.reasons,
+                        "score": stmt.excluded.score,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                    where=table.c.status == 'open',
+                )
+                self.db.session.execute(stmt)
+            # Kandidat open dari scan sebelumnya yang tidak lagi memenuhi syarat (data berubah / aturan skor berubah)
+            self.db.session.execute(delete(table).where(table.c.status == 'open', table.c.updated_at < scanned_at))
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+    def list_candidates(self, page, per_page, min_score=None, status='open'):
+        from sqlalchemy.orm import aliased
+        from app.models import Peserta, DuplicateCandidate
+        peserta_a, peserta_b = aliased(Peserta), aliased(Peserta)
+        query = (
+            self.db.session.query(DuplicateCandidate, peserta_a, peserta_b)
+            .join(peserta_a, peserta_a.id == DuplicateCandidate.peserta_a_id)
+            .join(peserta_b, peserta_b.id == DuplicateCandidate.peserta_b_id)
+            .filter(DuplicateCandidate.status == status)
+        )
+        if min_score is not None:
+            query = query.filter(DuplicateCandidate.score >= min_score)
+        return query.order_by(DuplicateCandidate.score.desc(), DuplicateCandidate.id).paginate(
+            page=page, per_page=per_page, error_out=False)
+
+    def dismiss(self, candidate_ids):
+        from app.models import DuplicateCandidate
+        try:
+            dismissed = self.db.session.query(DuplicateCandidate).filter(
+                DuplicateCandidate.id.in_(candidate_ids)
+            ).update({"status": 'dismissed'}, synchronize_session=False)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return dismissed
+
+    @staticmethod
+    def _validate_merges(merges):
+        pairs, merge_ids = [], set()
+        for keep_id, merge_id in merges:
+            if not keep_id or not merge_id or keep_id == merge_id:
+                raise DedupeError("Each merge needs two different 'keep_id' and 'merge_id' values")
+            if merge_id in merge_ids:
+                raise DedupeError(f"Peserta '{merge_id}' is merged more than once")
+            merge_ids.add(merge_id)
+            pairs.append((keep_id, merge_id))
+        # Rantai (A <- B, B <- C) ditolak agar hasil tidak bergantung pada urutan batch
+        chained = merge_ids.intersection(keep_id for keep_id, _ in pairs)
+        if chained:
+            raise DedupeError(f"Peserta '{sorted(chained)[0]}' cannot be both kept and merged")
+        return pairs
+
+    def merge(self, merges):
+        """
+        Menggabungkan pasangan (keep_id, merge_id): data dan check-in peserta merge_id dipindahkan ke
+        keep_id, lalu merge_id dihapus. Dijalankan per batch (DEDUPE_MERGE_BATCH_SIZE) dalam satu transaksi
+        per batch. Pasangan yang salah satu pesertanya sudah tidak ada dilewati.
+        """
+        pairs = self._validate_merges(merges)
+        batch_size = self._config('DEDUPE_MERGE_BATCH_SIZE', 500)
+        merged = 0
+        for start in range(0, len(pairs), batch_size):
+            try:
+                merged += self._merge_batch(pairs[start:start + batch_size])
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+        logger.info(f"Merged {merged} duplicate peserta.")
+        return merged
+
+    def _merge_batch(self, pairs):
+        from app.models import Peserta
+        session = self.db.session
+        ids = {peserta_id for pair in pairs for peserta_id in pair}
+        pesertas = {p.id: p for p in session.query(Peserta).filter(Peserta.id.in_(ids)).all()}
+        pairs = [(keep_id, merge_id) for keep_id, merge_id in pairs if keep_id in pesertas and merge_id in pesertas]
+        if not pairs:
+            return 0
+
+        self._move_attendance({merge_id: keep_id for keep_id, merge_id in pairs})
+
+        qr_moves = {}
+        for keep_id, merge_id in pairs:
+            keep, duplicate = pesertas[keep_id], pesertas[merge_id]
+            keep.nomor_telepon = keep.nomor_telepon or duplicate.nomor_telepon
+            keep.data_mentah_google_forms = keep.data_mentah_google_forms or duplicate.data_mentah_google_forms
+            if STATUS_RANK.get(duplicate.status_pendaftaran, 0) > STATUS_RANK.get(keep.status_pendaftaran, 0):
+                # Status diambil bersama waktu approval dan penanda email konfirmasi milik duplikat
+                keep.status_pendaftaran = duplicate.status_pendaftaran
+                keep.timestamp_approval = duplicate.timestamp_approval
+                keep.confirmation_sent_at = duplicate.confirmation_sent_at
+            if duplicate.status_kehadiran:
+                keep.status_kehadiran = True
+                keep.timestamp_kehadiran = min(
+                    (t for t in (keep.timestamp_kehadiran, duplicate.timestamp_kehadiran) if t), default=None)
+            if duplicate.timestamp_registrasi and (not keep.timestamp_registrasi
+                                                   or duplicate.timestamp_registrasi < keep.timestamp_registrasi):
+                keep.timestamp_registrasi = duplicate.timestamp_registrasi
+            # QR yang sudah dikirim ke peserta tetap berlaku setelah digabung. Pemindahan ditunda sampai flush,
+            # jadi qr_moves juga dicek agar duplikat kedua dengan keep_id sama tidak menimpa (dan menghapus) QR pertama
+            if not keep.qr_code_data and keep_id not in qr_moves and duplicate.qr_code_data:
+                qr_moves[keep_id] = duplicate.qr_code_data
+                duplicate.qr_code_data = None
+
+        # qr_code_data unik: lepaskan dulu dari baris duplikat sebelum dipindahkan
+        session.flush()
+        for keep_id, qr_code_data in qr_moves.items():
+            pesertas[keep_id].qr_code_data = qr_code_data
+        for _, merge_id in pairs:
+            session.delete(pesertas[merge_id])
+        session.flush()
+        return len(pairs)
+
+    def _move_attendance(self, keep_of):
+        """
+        Memindahkan attendance_event milik peserta duplikat ke peserta yang dipertahankan.
+        Check-in duplikat pada sesi yang sudah dimiliki peserta tujuan dibuang dan rollup dikoreksi.
+        """
+        from app.models import AttendanceEvent
+        from app.services.attendance_service import AttendanceService
+        session = self.db.session
+        table = AttendanceEvent.__table__
+        events = session.execute(
+            select(table.c.id, table.c.peserta_id, table.c.session_id)
+            .where(table.c.peserta_id.in_(set(keep_of) | set(keep_of.values())))
+        ).all()
+
+        taken = {(e.peserta_id, e.session_id) for e in events if e.peserta_id not in keep_of}
+        moves, dropped_ids = [], []
+        for e in events:
+            keep_id = keep_of.get(e.peserta_id)
+            if keep_id is None:
+                continue
+            if (keep_id, e.session_id) in taken:
+                dropped_ids.append(e.id)
+            else:
+                taken.add((keep_id, e.session_id))
+                moves.append({"b_id": e.id, "b_peserta_id": keep_id})
+
+        if moves:
+            session.execute(
+                update(table).where(table.c.id == bindparam('b_id')).values(peserta_id=bindparam('b_peserta_id')),
+                moves
+            )
+        # Dihapus lewat AttendanceService agar total dan first/last check-in per sesi ikut dikoreksi
+        AttendanceService().remove_events_by_id(dropped_ids)
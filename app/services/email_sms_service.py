@@ -1,6 +1,8 @@
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.mime.image import MIMEImage
+from email.utils import make_msgid
 import logging
 import traceback
 
@@ -11,6 +13,60 @@ class EmailSMSService: # <-- PASTIKAN NAMA KELAS INI BENAR!
         self.app_config = app_config 
         logger.info("EmailSMSService initialized (SMS functionality removed).") 
 
-    def send_email(self, recipient_email, subject, body):
-        # ... (rest of your send_email method) ...
-        pass # Placeholder
\ No newline at end of file
+    @staticmethod
+    def make_content_id(domain='regisync'):
+        """
+        Membuat Content-ID unik (tanpa kurung sudut) untuk dirujuk dari HTML sebagai cid:...
+        """
+        return make_msgid(domain=domain)[1:-1]
+
+    def build_message(self, recipient_email, subject, body, inline_images=None):
+        """
+        Menyusun email HTML. `inline_images` adalah dict content_id -> bytes PNG yang dilampirkan
+        sebagai multipart/related sehingga bisa ditampilkan dengan <img src="cid:...">.
+        """
+        message = MIMEMultipart('related')
+        message['Subject'] = subject
+        message['From'] = self.app_config.get('MAIL_DEFAULT_SENDER') or self.app_config.get('MAIL_USERNAME') or ''
+        message['To'] = recipient_email
+        message.attach(MIMEText(body, 'html', 'utf-8'))
+
+        for content_id, image_bytes in (inline_images or {}).items():
+            image = MIMEImage(image_bytes, 'png')
+            image.add_header('Content-ID', f'<{content_id}>')
+            image.add_header('Content-Disposition', 'inline', filename=f'{content_id.split("@")[0]}.png')
+            message.attach(image)
+        return message
+
+    def _connect(self):
+        # Timeout pendek: mailout berjalan di background, tapi koneksi yang macet tidak boleh menahan batch lama-lama
+        server = smtplib.SMTP(self.app_config.get('MAIL_SERVER'), self.app_config.get('MAIL_PORT'),
+                              timeout=self.app_config.get('MAIL_TIMEOUT', 10))
+        if self.app_config.get('MAIL_USE_TLS'):
+            server.starttls()
+        if self.app_config.get('MAIL_USERNAME'):
+            server.login(self.app_config.get('MAIL_USERNAME'), self.app_config.get('MAIL_PASSWORD'))
+        return server
+
+    def deliver(self, messages):
+        """
+        Mengirim banyak pesan lewat satu koneksi SMTP (untuk mailout besar). Mengembalikan list bool per pesan
+        (True = diterima server SMTP) agar pemanggil bisa menandai penerima mana yang sudah terkirim.
+        """
+        delivered = [False] * len(messages)
+        if not self.app_config.get('MAIL_USERNAME'):
+            logger.warning(f"MAIL_USERNAME is not configured; skipping {len(messages)} email(s).")
+            return delivered
+
+        try:
+            with self._connect() as server:
+                for i, message in enumerate(messages):
+                    try:
+                        server.send_message(message)
+                        delivered[i] = True
+                    except smtplib.SMTPRecipientsRefused as e:
+                        logger.warning(f"Email to {message['To']} refused: {e}")
+        except Exception as e:
+            logger.error(f"Error sending email(s): {e}\n{traceback.format_exc()}")
+        logger.info(f"Sent {sum(delivered)}/{len(messages)} email(s).")
+        return delivered
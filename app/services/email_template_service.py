@@ -0,0 +1,50 @@
+from functools import lru_cache
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'email')
+
+
+class EmailTemplateService:
+    """
+    Template email Jinja2 yang dikompilasi sekali saat service dibuat, lalu dipakai ulang
+    untuk setiap pesan (termasuk render ribuan pesan dalam satu batch mailout).
+    """
+
+    def __init__(self, template_dir=TEMPLATE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.templates = {name: self.env.get_template(name) for name in self.env.list_templates()}
+        logger.info(f"EmailTemplateService initialized with {len(self.templates)} precompiled template(s).")
+
+    def render(self, template_name, **context):
+        return self.templates[template_name].render(**context)
+
+    def render_confirmation_batch(self, pesertas, qr_cids=None):
+        """
+        Generator (peserta, html) untuk mailout besar; `qr_cids` adalah dict peserta.id -> content id.
+        """
+        template = self.templates['confirmation.html']
+        qr_cids = qr_cids or {}
+        for peserta in pesertas:
+            qr_cid = qr_cids.get(peserta.id)
+            yield peserta, template.render(
+                nama=peserta.nama,
+                email=peserta.email,
+                status_pendaftaran=peserta.status_pendaftaran,
+                qr_src=f"cid:{qr_cid}" if qr_cid else None,
+                qr_code_url=None,
+            )
+
+
+@lru_cache(maxsize=None)
+def get_email_template_service():
+    return EmailTemplateService()
@@ -0,0 +1,134 @@
+from sqlalchemy import bindparam, column, or_, text
+from flask import current_app
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Nama kolom promosi dipakai langsung di DDL, jadi dibatasi ke identifier sederhana
+PROMOTED_NAME_PATTERN = re.compile(r'^[a-z][a-z0-9_]{0,40}$')
+FORM_PARAM_PREFIX = 'form.'
+
+
+class FormFilterError(ValueError):
+    pass
+
+
+def _nested(path, value):
+    """
+    'a.b' + 'x' -> {"a": {"b": "x"}}; filter path diubah menjadi containment (@>) agar memakai index GIN.
+    """
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+class FormAnswerService:
+    """
+    Filter jawaban mentah Google Forms (kolom JSONB data_mentah_google_forms) dan pengelolaan
+    kolom promosi (generated column + index btree) untuk jawaban yang sering difilter.
+    """
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    def _existing_promoted_columns(self, names):
+        """
+        Nama kolom form_<name> yang benar-benar ada di tabel peserta (promosi di config belum tentu sudah
+        dijalankan lewat `flask forms promote`).
+        """
+        if not names:
+            return set()
+        rows = self.db.session.execute(text(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'peserta' AND column_name IN :names"
+        ).bindparams(bindparam('names', expanding=True)), {"names": [f"form_{name}" for name in names]})
+        return {name[len('form_'):] for name in rows.scalars()}
+
+    def _path_equals(self, path, value):
+        """
+        Jawaban checkbox tersimpan sebagai array JSON, jadi nilai dicocokkan sebagai skalar maupun
+        sebagai anggota array; keduanya containment sehingga tetap memakai index GIN.
+        """
+        from app.models import Peserta
+        return or_(Peserta.data_mentah_google_forms.contains(_nested(path, value)),
+                   Peserta.data_mentah_google_forms.contains(_nested(path, [value])))
+
+    @property
+    def promoted_fields(self):
+        """
+        dict nama -> path (list key) dari konfigurasi PROMOTED_FORM_FIELDS, mis. {"workshop": "Pilihan Workshop"}.
+        """
+        fields = {}
+        for name, path in (current_app.config.get('PROMOTED_FORM_FIELDS') or {}).items():
+            if not PROMOTED_NAME_PATTERN.match(name):
+                raise FormFilterError(f"Invalid promoted form field name '{name}'")
+            fields[name] = path.split('.') if isinstance(path, str) else list(path)
+        return fields
+
+    def build_filters(self, args):
+        """
+        Menerjemahkan parameter query menjadi kriteria SQLAlchemy:
+        - `form={"Pilihan Workshop": "Data"}`  -> containment JSONB (@>)
+        - `form.Pilihan Workshop=Data`          -> path sama dengan nilai (atau array yang memuat nilai);
+                                                   memakai kolom promosi jika path tersebut dipromosikan
+                                                   dan kolomnya sudah dibuat, selain itu containment
+        """
+        from app.models import Peserta
+
+        criteria = []
+        raw = args.get('form', '').strip()
+        if raw:
+            try:
+                document = json.loads(raw)
+            except ValueError:
+                raise FormFilterError("'form' must be a JSON object")
+            if not isinstance(document, dict):
+                raise FormFilterError("'form' must be a JSON object")
+            criteria.append(Peserta.data_mentah_google_forms.contains(document))
+
+        promoted_by_path = {tuple(path): name for name, path in self.promoted_fields.items()}
+        filters = [(key[len(FORM_PARAM_PREFIX):].split('.'), value) for key, value in args.items(multi=True)
+                   if key.startswith(FORM_PARAM_PREFIX) and len(key) > len(FORM_PARAM_PREFIX)]
+        existing = self._existing_promoted_columns(
+            {promoted_by_path[tuple(path)] for path, _ in filters if tuple(path) in promoted_by_path})
+        for path, value in filters:
+            promoted = promoted_by_path.get(tuple(path))
+            if promoted and promoted not in existing:
+                logger.warning(f"Promoted form field '{promoted}' has no column yet; run `flask forms promote`.")
+                promoted = None
+            if promoted:
+                # Kolom promosi berisi teks skalar; jawaban array tetap dicocokkan lewat containment
+                criteria.append(or_(column(f"form_{promoted}") == value,
+                                    Peserta.data_mentah_google_forms.contains(_nested(path, [value]))))
+            else:
+                criteria.append(self._path_equals(path, value))
+        return criteria
+
+    def promote_field(self, name, path):
+        """
+        Menambahkan generated column `form_<name>` (teks dari path JSON) beserta index btree.
+        """
+        if not PROMOTED_NAME_PATTERN.match(name):
+            raise FormFilterError(f"Invalid promoted form field name '{name}'")
+        path = path.split('.') if isinstance(path, str) else list(path)
+        # DDL tidak menerima bind parameter, jadi path ditulis sebagai literal text[] yang di-escape
+        path_array = '{' + ','.join('"' + key.replace('\\', '\\\\').replace('"', '\\"') + '"' for key in path) + '}'
+        # ':' di-escape agar tidak dianggap bind parameter oleh text()
+        path_literal = ("'" + path_array.replace("'", "''") + "'").replace(':', '\\:')
+
+        try:
+            self.db.session.execute(text(
+                f"ALTER TABLE peserta ADD COLUMN IF NOT EXISTS form_{name} TEXT "
+                f"GENERATED ALWAYS AS (data_mentah_google_forms #>> {path_literal}::text[]) STORED"
+            ))
+            self.db.session.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_peserta_form_{name} ON peserta (form_{name})"
+            ))
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        logger.info(f"Promoted form answer '{'.'.join(path)}' to column form_{name}.")
@@ -0,0 +1,132 @@
+from datetime import datetime
+from sqlalchemy import text
+from flask import current_app
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Nama partisi bulanan: log_error_YYYYMM (lihat migrasi 3f2a9c1d7e01)
+PARTITION_NAME_PATTERN = re.compile(r'^log_error_(\d{4})(\d{2})$')
+DEFAULT_PARTITION = 'log_error_default'
+
+
+def _add_months(tanggal, months):
+    total = tanggal.year * 12 + (tanggal.month - 1) + months
+    return datetime(total // 12, total % 12 + 1, 1)
+
+
+class LogRetentionService:
+    """
+    Mengelola partisi bulanan tabel log_error: membuat partisi ke depan
+    dan membuang partisi lama secara utuh (DROP TABLE, bukan DELETE per baris).
+    """
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    def list_partitions(self):
+        """
+        Mengembalikan list (nama_partisi, awal_bulan) untuk semua partisi bulanan log_error,
+        diurutkan dari yang paling lama. Partisi default tidak ikut dikembalikan.
+        """
+        rows = self.db.session.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = 'log_error'
+        """)).scalars().all()
+
+        partitions = []
+        for name in rows:
+            match = PARTITION_NAME_PATTERN.match(name)
+            if match:
+                partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda item: item[1])
+
+    def ensure_partitions(self, months_ahead=None):
+        """
+        Membuat partisi untuk bulan ini sampai `months_ahead` bulan ke depan jika belum ada. Bulan lama yang
+        barisnya tertampung di partisi default (mis. cron tidak jalan beberapa bulan) ikut dibuatkan partisi
+        agar bisa di-prune.
+        """
+        if months_ahead is None:
+            months_ahead = current_app.config.get('LOG_ERROR_PARTITION_PREMAKE_MONTHS', 3)
+
+        bulan_ini = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        existing = {name for name, _ in self.list_partitions()}
+        oldest_default = self.db.session.execute(text(f"SELECT min(timestamp) FROM {DEFAULT_PARTITION}")).scalar()
+        awal = min(bulan_ini, oldest_default.replace(day=1, hour=0, minute=0, second=0, microsecond=0)) \
+            if oldest_default else bulan_ini
+        akhir_premake = _add_months(bulan_ini, months_ahead + 1)
+
+        created = []
+        try:
+            while awal < akhir_premake:
+                akhir = _add_months(awal, 1)
+                name = f"log_error_{awal:%Y%m}"
+                if name not in existing:
+                    self._create_partition(name, awal, akhir)
+                if awal >= bulan_ini or name not in existing:
+                    created.append(name)
+                awal = akhir
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        logger.info(f"log_error partitions ensured up to {created[-1]}.")
+        return created
+
+    def _create_partition(self, name, awal, akhir):
+        """
+        CREATE TABLE ... PARTITION OF gagal jika partisi default sudah berisi baris untuk rentang itu.
+        Dalam kasus itu tabel dibuat terpisah, baris dipindahkan dari partisi default, lalu di-ATTACH;
+        semuanya dalam transaksi pemanggil.
+        """
+        bounds = {"awal": awal, "akhir": akhir}
+        stranded = self.db.session.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE timestamp >= :awal AND timestamp < :akhir)"
+        ), bounds).scalar()
+        range_sql = f"FOR VALUES FROM ('{awal:%Y-%m-%d}') TO ('{akhir:%Y-%m-%d}')"
+        if not stranded:
+            self.db.session.execute(text(f'CREATE TABLE "{name}" PARTITION OF log_error {range_sql}'))
+            return
+
+        self.db.session.execute(text(f'CREATE TABLE "{name}" (LIKE log_error INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+        moved = self.db.session.execute(text(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :awal AND timestamp < :akhir '
+            f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'
+        ), bounds).rowcount
+        self.db.session.execute(text(f'ALTER TABLE log_error ATTACH PARTITION "{name}" {range_sql}'))
+        logger.warning(f"Moved {moved} row(s) from {DEFAULT_PARTITION} into new partition {name}.")
+
+    def prune(self, retention_months=None):
+        """
+        Membuang partisi yang seluruh isinya lebih tua dari `retention_months` bulan.
+        Partisi di-DETACH lalu di-DROP sehingga tidak ada DELETE besar maupun vacuum susulan.
+        """
+        if retention_months is None:
+            retention_months = current_app.config.get('LOG_ERROR_RETENTION_MONTHS', 6)
+
+        bulan_ini = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        cutoff = _add_months(bulan_ini, -retention_months)
+
+        dropped = []
+        try:
+            for name, awal in self.list_partitions():
+                # Batas atas partisi (awal bulan berikutnya) harus <= cutoff agar semua barisnya kedaluwarsa
+                if _add_months(awal, 1) > cutoff:
+                    break
+                self.db.session.execute(text(f'ALTER TABLE log_error DETACH PARTITION "{name}"'))
+                self.db.session.execute(text(f'DROP TABLE "{name}"'))
+                dropped.append(name)
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} expired log_error partition(s): {', '.join(dropped)}")
+        return dropped
@@ -0,0 +1,259 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select, update
+from flask import current_app
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+CONFIRMATION_EMAIL_SUBJECT = "Pendaftaran RegiSync Anda Dikonfirmasi!"
+_STOP = object()
+_worker_lock = threading.Lock()
+
+
+class ConfirmationMailout:
+    """
+    Mailout email konfirmasi yang bisa dilanjutkan. Setiap batch peserta 'registered' yang belum punya
+    confirmation_sent_at diklaim dalam transaksi singkat (FOR UPDATE SKIP LOCKED + confirmation_claimed_at),
+    dikirim lewat satu koneksi SMTP di luar transaksi, lalu ditandai terkirim. Baris peserta tidak terkunci
+    selama SMTP berjalan. Jika proses mati di tengah jalan, batch itu diambil ulang setelah klaimnya lewat
+    (MAILOUT_CLAIM_SECONDS); menjalankan ulang mailout hanya mengirim ke peserta yang belum ditandai.
+    PNG QR dibuat sekali (saat approval) dan disimpan di peserta_qr_image.
+    """
+
+    def __init__(self, email_sms_service=None, qr_code_service=None):
+        self._email_sms_service = email_sms_service
+        self._qr_code_service = qr_code_service
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    @property
+    def email_sms_service(self):
+        if self._email_sms_service is None:
+            from app.services.email_sms_service import EmailSMSService
+            self._email_sms_service = EmailSMSService(current_app.config)
+        return self._email_sms_service
+
+    @property
+    def qr_code_service(self):
+        if self._qr_code_service is None:
+            from app.services.qr_code_service import QRCodeService
+            self._qr_code_service = QRCodeService()
+        return self._qr_code_service
+
+    def qr_images(self, pesertas):
+        """
+        Mengembalikan dict peserta.id -> PNG QR. PNG yang belum ada (approval sebelum tabel ini ada) atau
+        yang datanya berbeda (mis. QR dipindah saat merge) dibuat dan ditambahkan ke session; pemanggil
+        yang melakukan commit.
+        """
+        from app.models import PesertaQrImage
+        session = self.db.session
+        stored = {image.peserta_id: image for image in session.query(PesertaQrImage)
+                  .filter(PesertaQrImage.peserta_id.in_([p.id for p in pesertas])).all()}
+        images = {}
+        for peserta in pesertas:
+            if not peserta.qr_code_data:
+                continue
+            image = stored.get(peserta.id)
+            if image is None or image.qr_code_data != peserta.qr_code_data:
+                png = self.qr_code_service.generate_qr_code(peserta.qr_code_data)
+                if png is None:
+                    continue
+                if image is None:
+                    image = PesertaQrImage(peserta_id=peserta.id)
+                    session.add(image)
+                image.qr_code_data = peserta.qr_code_data
+                image.png = png
+            images[peserta.id] = image.png
+        return images
+
+    def _update_state(self, peserta_ids, **values):
+        from app.models import Peserta
+        table = Peserta.__table__
+        # Penanda mailout bukan perubahan data peserta: row_version/updated_at ditulis ulang agar ETag tetap
+        self.db.session.execute(update(table).where(table.c.id.in_(peserta_ids)).values(
+            row_version=table.c.row_version,
+            updated_at=table.c.updated_at,
+            **values,
+        ))
+
+    def reset(self, ids=None):
+        """
+        Menghapus penanda terkirim (untuk kirim ulang) bagi peserta 'registered', atau hanya `ids`.
+        """
+        from app.models import Peserta
+        table = Peserta.__table__
+        stmt = update(table).where(table.c.status_pendaftaran == 'registered',
+                                   table.c.confirmation_sent_at.isnot(None))
+        if ids:
+            stmt = stmt.where(table.c.id.in_(ids))
+        try:
+            result = self.db.session.execute(stmt.values(
+                confirmation_sent_at=None,
+                confirmation_claimed_at=None,
+                row_version=table.c.row_version,
+                updated_at=table.c.updated_at,
+            ))
+            self.db.session.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        return result.rowcount
+
+    def progress(self):
+        from app.models import Peserta
+        registered, sent = self.db.session.query(
+            func.count(), func.count(Peserta.confirmation_sent_at)
+        ).filter(Peserta.status_pendaftaran == 'registered').one()
+        return {"registered": registered, "sent": sent, "pending": registered - sent}
+
+    def run(self, ids=None, batch_size=None, stop_event=None):
+        """
+        Mengirim email konfirmasi ke semua peserta yang belum ditandai (atau hanya `ids`).
+        Berhenti lebih awal jika stop_event di-set atau satu batch penuh gagal terkirim (SMTP bermasalah).
+        Mengembalikan {"sent", "failed"}.
+        """
+        from app.models import Peserta
+        from app.services.email_template_service import get_email_template_service
+
+        session = self.db.session
+        batch_size = batch_size or current_app.config.get('EMAIL_BATCH_SIZE', 100)
+        template_service = get_email_template_service()
+        sent, failed = 0, set()
+
+        while not (stop_event and stop_event.is_set()):
+            now = datetime.utcnow()
+            claim_expired = now - timedelta(seconds=current_app.config.get('MAILOUT_CLAIM_SECONDS', 1800))
+            query = select(Peserta).where(Peserta.status_pendaftaran == 'registered',
+                                          Peserta.qr_code_data.isnot(None),
+                                          Peserta.confirmation_sent_at.is_(None),
+                                          or_(Peserta.confirmation_claimed_at.is_(None),
+                                              Peserta.confirmation_claimed_at < claim_expired))
+            if ids:
+                query = query.where(Peserta.id.in_(ids))
+            if failed:
+                query = query.where(Peserta.id.notin_(failed))
+            # SKIP LOCKED hanya selama klaim: worker lain (atau CLI) yang sedang mengklaim tidak ditunggu
+            query = query.order_by(Peserta.id).limit(batch_size).with_for_update(skip_locked=True, of=Peserta)
+
+            # 1) Klaim + susun pesan dalam transaksi singkat
+            try:
+                pesertas = session.execute(query).scalars().all()
+                if not pesertas:
+                    session.rollback()
+                    break
+                peserta_ids = [p.id for p in pesertas]
+                images = self.qr_images(pesertas)
+                content_ids = {peserta_id: self.email_sms_service.make_content_id() for peserta_id in images}
+                messages = [
+                    self.email_sms_service.build_message(
+                        p.email, CONFIRMATION_EMAIL_SUBJECT, html,
+                        {content_ids[p.id]: images[p.id]} if p.id in images else None
+                    )
+                    for p, html in template_service.render_confirmation_batch(pesertas, content_ids)
+                ]
+                self._update_state(peserta_ids, confirmation_claimed_at=now)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+
+            # 2) SMTP di luar transaksi; tidak ada lock baris yang ditahan
+            delivered = self.email_sms_service.deliver(messages)
+            sent_ids = [peserta_id for peserta_id, ok in zip(peserta_ids, delivered) if ok]
+            failed_ids = [peserta_id for peserta_id, ok in zip(peserta_ids, delivered) if not ok]
+
+            # 3) Tandai terkirim; klaim yang gagal dilepas agar mailout berikutnya mencoba lagi
+            try:
+                if sent_ids:
+                    self._update_state(sent_ids, confirmation_sent_at=datetime.utcnow(), confirmation_claimed_at=None)
+                if failed_ids:
+                    self._update_state(failed_ids, confirmation_claimed_at=None)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+
+            sent += len(sent_ids)
+            failed.update(failed_ids)
+            if not sent_ids:
+                logger.warning(f"Confirmation mailout stopped: none of {len(peserta_ids)} email(s) in the batch were sent.")
+                break
+
+        logger.info(f"Confirmation mailout finished: {sent} sent, {len(failed)} failed.")
+        return {"sent": sent, "failed": len(failed)}
+
+
+class MailoutWorker:
+    """
+    Thread background per worker yang menjalankan ConfirmationMailout dari antrean, sehingga endpoint
+    (approve, send-confirmations) tidak menunggu SMTP. Job yang terputus saat worker mati dilanjutkan
+    oleh mailout berikutnya karena penanda terkirim disimpan per peserta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._busy = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='confirmation-mailout', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, ids=None):
+        self._queue.put(list(ids) if ids else None)
+
+    @property
+    def running(self):
+        return self._busy.is_set() or not self._queue.empty()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            ids = self._queue.get()
+            if ids is _STOP:
+                return
+            self._busy.set()
+            with self.app.app_context():
+                try:
+                    ConfirmationMailout().run(ids, stop_event=self._stop)
+                except Exception:
+                    logger.error("Background confirmation mailout failed.", exc_info=True)
+                finally:
+                    self._busy.clear()
+
+
+def _mailout_worker(app):
+    with _worker_lock:
+        pid, worker = app.extensions.get('mailout_worker', (None, None))
+        if worker is None or pid != os.getpid():
+            # Dibuat saat pertama dipakai, jadi setiap worker gunicorn (setelah fork) punya thread sendiri
+            worker = MailoutWorker(app)
+            worker.start()
+            app.extensions['mailout_worker'] = (os.getpid(), worker)
+        return worker
+
+
+def submit_mailout(app, ids=None):
+    _mailout_worker(app).submit(ids)
+
+
+def mailout_running(app):
+    pid, worker = app.extensions.get('mailout_worker', (None, None))
+    return worker is not None and pid == os.getpid() and worker.running
+
+
+def stop_mailout_worker(app):
+    pid, worker = app.extensions.pop('mailout_worker', (None, None))
+    if worker is not None and pid == os.getpid():
+        worker.stop(timeout=5)
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+# Nilai header X-Profile / query ?_profile: 1 = simpan di ring buffer worker ini, json/pstats = kembalikan hasilnya
+# langsung sebagai response (tidak bergantung pada worker mana yang melayani request berikutnya)
+PROFILE_MODES = {'1': 'store', 'true': 'store', 'yes': 'store', 'on': 'store', 'json': 'json', 'pstats': 'pstats'}
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def profile_mode(value):
+    """
+    Mode profiling dari nilai header/query, atau None jika profiling tidak diminta ('0', 'false', kosong, ...).
+    """
+    return PROFILE_MODES.get((value or '').strip().lower())
+
+
+class RequestProfiler:
+    """
+    Profiling on-demand untuk satu request admin: cProfile + daftar SQL beserta durasinya.
+    Hasil disimpan di ring buffer per proses (PROFILE_RING_SIZE entri terakhir); dengan beberapa worker gunicorn,
+    minta hasilnya langsung lewat `X-Profile: json` atau `X-Profile: pstats`. Listener SQL hanya
+    dipasang selama request yang diprofile berjalan, jadi request biasa tidak menanggung overhead apa pun.
+    """
+
+    def __init__(self, app_config):
+        self.ring_size = app_config.get('PROFILE_RING_SIZE', 20)
+        self.top_functions = app_config.get('PROFILE_TOP_FUNCTIONS', 50)
+        self.max_statements = app_config.get('PROFILE_SQL_MAX_STATEMENTS', 500)
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        # cProfile tidak bisa dipakai dua request sekaligus (satu profiler aktif per interpreter)
+        self._running = threading.Lock()
+
+    def run(self, engine, fn, label, admin=None):
+        """
+        Menjalankan fn() di bawah profiler. Mengembalikan (profile_id, hasil fn).
+        """
+        import cProfile
+        import pstats
+
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusyError("Another request is being profiled")
+        try:
+            thread_id = threading.get_ident()
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                if threading.get_ident() == thread_id:
+                    conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+            def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                if threading.get_ident() != thread_id or not conn.info.get('profile_query_start'):
+                    return
+                elapsed = time.perf_counter() - conn.info['profile_query_start'].pop()
+                if len(statements) < self.max_statements:
+                    statements.append({
+                        "statement": statement[:2000],
+                        "executemany": executemany,
+                        "rows": cursor.rowcount,
+                        "duration_ms": round(elapsed * 1000, 3),
+                    })
+
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+            profiler = cProfile.Profile()
+            started_at = datetime.utcnow()
+            started = time.perf_counter()
+            try:
+                profiler.enable()
+                try:
+                    result = fn()
+                finally:
+                    profiler.disable()
+            finally:
+                event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+                event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+            duration = time.perf_counter() - started
+        finally:
+            self._running.release()
+
+        stats = pstats.Stats(profiler)
+        profile_id = uuid.uuid4().hex[:12]
+        record = {
+            "id": profile_id,
+            "label": label,
+            "admin": admin,
+            "started_at": started_at,
+            "duration_ms": round(duration * 1000, 3),
+            "status_code": getattr(result, 'status_code', None),
+            "sql_count": len(statements),
+            "sql_ms": round(sum(s["duration_ms"] for s in statements), 3),
+            "sql": statements,
+            "functions": self._top_functions(stats),
+            "pstats": stats.stats,
+        }
+        with self._lock:
+            self._profiles[profile_id] = record
+            while len(self._profiles) > self.ring_size:
+                self._profiles.popitem(last=False)
+        logger.info(f"Profiled '{label}' as {profile_id}: {record['duration_ms']} ms, {len(statements)} SQL statement(s).")
+        return profile_id, result
+
+    def _top_functions(self, stats):
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top_functions]
+        return [{
+            "function": f"{name} ({filename}:{line})",
+            "calls": calls,
+            "total_ms": round(total_time * 1000, 3),
+            "cumulative_ms": round(cumulative_time * 1000, 3),
+        } for (filename, line, name), (_, calls, total_time, cumulative_time, _) in rows]
+
+    def list(self):
+        with self._lock:
+            records = list(self._profiles.values())
+        return [{key: record[key] for key in ("id", "label", "admin", "started_at", "duration_ms", "status_code", "sql_count", "sql_ms")}
+                for record in reversed(records)]
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    @staticmethod
+    def to_json(record):
+        payload = {key: value for key, value in record.items() if key != 'pstats'}
+        payload["started_at"] = record["started_at"].isoformat()
+        return payload
+
+    @staticmethod
+    def dump_pstats(record):
+        """
+        Isi file .prof (format yang sama dengan cProfile.Profile.dump_stats), bisa dibuka dengan
+        `python -m pstats` atau snakeviz.
+        """
+        import marshal
+        return marshal.dumps(record["pstats"])
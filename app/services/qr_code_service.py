@@ -1,5 +1,3 @@
-import qrcode
-from PIL import Image
 import io
 import logging
 
@@ -10,6 +8,7 @@ class QRCodeService:
         """
         Generates a QR code image as bytes.
         """
+        import qrcode # Diimpor saat dipakai: qrcode + PIL lambat diimpor dan tidak dibutuhkan saat startup
         try:
             qr = qrcode.QRCode(
                 version=1,
@@ -35,6 +34,7 @@ class QRCodeService:
         """
         Generates and saves a QR code image to a file. (Mostly for debugging/local use)
         """
+        import qrcode
         try:
             qr = qrcode.QRCode(
                 version=1,
@@ -0,0 +1,252 @@
+from collections import OrderedDict
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryRateLimitStore:
+    """
+    Penyimpanan state limiter di memori proses (default). Setiap worker punya state sendiri.
+    Jumlah key dibatasi agar serangan dari banyak IP tidak membuat memori tumbuh tanpa batas.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key, fn):
+        """
+        Menjalankan fn(state_lama) -> (state_baru, hasil) secara atomik dan mengembalikan hasil.
+        """
+        with self._lock:
+            state, result = fn(self._data.get(key))
+            if state is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = state
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_keys:
+                    self._data.popitem(last=False)
+            return result
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+
+class SqliteRateLimitStore:
+    """
+    Penyimpanan state limiter bersama untuk semua worker di satu host, memakai file SQLite lokal
+    sebagai pengganti shared store (mis. Redis) tanpa dependensi tambahan.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limit_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, fn):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM rate_limit_state WHERE key = ?", (key,)).fetchone()
+            state, result = fn(json.loads(row[0]) if row else None)
+            if state is None:
+                conn.execute("DELETE FROM rate_limit_state WHERE key = ?", (key,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO rate_limit_state (key, value) VALUES (?, ?)",
+                             (key, json.dumps(state)))
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key):
+        row = self._connect().execute("SELECT value FROM rate_limit_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+class RateLimitService:
+    """
+    Token bucket per IP klien dan per username, ditambah lockout eksponensial setelah gagal login berulang.
+    `check()` wajib dipanggil SEBELUM hashing password agar request yang ditolak tidak memakan CPU.
+
+    Request dengan kredensial benar tidak boleh menghabiskan kuota: bucket username hanya dikurangi saat
+    otentikasi gagal, lockout dihitung per pasangan (IP, username) dan per IP, dan pasangan yang baru saja
+    berhasil login (mis. scanner pintu yang berbagi satu akun admin) dilewatkan dari token bucket selama
+    RATE_LIMIT_TRUSTED_SECONDS. Dengan begitu kegagalan dari IP lain tidak bisa memblokir check-in.
+    """
+
+    def __init__(self, app_config, store=None):
+        self.enabled = app_config.get('RATE_LIMIT_ENABLED', True)
+        self.capacity = app_config.get('RATE_LIMIT_CAPACITY', 30)
+        self.refill_per_second = app_config.get('RATE_LIMIT_REFILL_PER_SECOND', 1.0)
+        self.lockout_threshold = app_config.get('RATE_LIMIT_LOCKOUT_THRESHOLD', 5)
+        self.lockout_base_seconds = app_config.get('RATE_LIMIT_LOCKOUT_BASE_SECONDS', 30)
+        self.lockout_max_seconds = app_config.get('RATE_LIMIT_LOCKOUT_MAX_SECONDS', 3600)
+        self.trusted_seconds = app_config.get('RATE_LIMIT_TRUSTED_SECONDS', 900)
+
+        if store is None:
+            store_path = app_config.get('RATE_LIMIT_STORE_PATH')
+            store = SqliteRateLimitStore(store_path) if store_path else MemoryRateLimitStore()
+        self.store = store
+
+        self._metrics = {
+            "allowed": 0,
+            "allowed_trusted": 0,
+            "rejected_rate_limit": 0,
+            "rejected_lockout": 0,
+            "failures": 0,
+            "lockouts": 0,
+        }
+        self._metrics_lock = threading.Lock()
+        logger.info(f"RateLimitService initialized with {type(store).__name__}.")
+
+    def _count(self, name):
+        with self._metrics_lock:
+            self._metrics[name] += 1
+
+    @staticmethod
+    def _ip_key(ip):
+        return f"ip:{ip or 'unknown'}"
+
+    @staticmethod
+    def _pair_key(ip, username):
+        return f"pair:{ip or 'unknown'}|{username}"
+
+    def _lockout_keys(self, ip, username):
+        keys = [self._ip_key(ip)]
+        if username:
+            keys.append(self._pair_key(ip, username))
+        return keys
+
+    def _refilled(self, state, now):
+        tokens, updated = (state or {}).get('tokens', self.capacity), (state or {}).get('updated', now)
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+    def _retry_after(self, tokens):
+        if tokens >= 1:
+            return 0
+        return (1 - tokens) / self.refill_per_second if self.refill_per_second else self.lockout_max_seconds
+
+    def _consume_token(self, key, now):
+        def fn(state):
+            tokens = self._refilled(state, now)
+            retry_after = self._retry_after(tokens)
+            if retry_after:
+                return {'tokens': tokens, 'updated': now}, retry_after
+            return {'tokens': tokens - 1, 'updated': now}, 0
+        return self.store.update(f"bucket:{key}", fn)
+
+    def _peek_tokens(self, key, now):
+        return self._retry_after(self._refilled(self.store.get(f"bucket:{key}"), now))
+
+    def check(self, ip, username=None):
+        """
+        Mengembalikan (allowed, retry_after_seconds). Tidak melakukan query database maupun hashing.
+        """
+        if not self.enabled:
+            return True, 0
+
+        now = time.time()
+        states = [self.store.get(f"lockout:{key}") for key in self._lockout_keys(ip, username)]
+        locked = max(max(0, (state or {}).get('locked_until', 0) - now) for state in states)
+        if locked > 0:
+            self._count("rejected_lockout")
+            return False, locked
+
+        pair = states[1] if username else None
+        if pair and pair.get('trusted_until', 0) > now:
+            self._count("allowed_trusted")
+            return True, 0
+
+        retry_after = self._consume_token(self._ip_key(ip), now)
+        if not retry_after and username:
+            # Bucket username hanya dikurangi oleh kegagalan (record_failure); di sini cukup dibaca
+            retry_after = self._peek_tokens(f"user:{username}", now)
+        if retry_after > 0:
+            self._count("rejected_rate_limit")
+            return False, retry_after
+
+        self._count("allowed")
+        return True, 0
+
+    def record_failure(self, ip, username=None):
+        """
+        Mencatat kegagalan otentikasi. Setelah `lockout_threshold` kegagalan beruntun, IP dan pasangan
+        (IP, username) dikunci selama lockout_base_seconds * 2^(kegagalan - threshold), maksimal
+        lockout_max_seconds. Kegagalan juga mengurangi bucket username dan mencabut status trusted pasangan.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        self._count("failures")
+
+        def fn(state):
+            failures = (state or {}).get('failures', 0) + 1
+            locked_until = (state or {}).get('locked_until', 0)
+            newly_locked = False
+            if failures >= self.lockout_threshold:
+                duration = min(self.lockout_max_seconds,
+                               self.lockout_base_seconds * 2 ** (failures - self.lockout_threshold))
+                locked_until = now + duration
+                newly_locked = True
+            return {'failures': failures, 'locked_until': locked_until}, newly_locked
+
+        for key in self._lockout_keys(ip, username):
+            if self.store.update(f"lockout:{key}", fn):
+                self._count("lockouts")
+                logger.warning(f"Authentication locked out for '{key}' after repeated failures.")
+        if username:
+            self._consume_token(f"user:{username}", now)
+
+    def record_success(self, ip, username=None):
+        """
+        Menghapus hitungan kegagalan dan menandai pasangan (IP, username) sebagai trusted. Store hanya
+        ditulis jika ada kegagalan yang perlu dihapus atau status trusted hampir habis, jadi request admin
+        biasa cukup membaca.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        ip_key = f"lockout:{self._ip_key(ip)}"
+        if (self.store.get(ip_key) or {}).get('failures'):
+            self.store.update(ip_key, lambda state: (None, None))
+        if not username:
+            return
+
+        pair_key = f"lockout:{self._pair_key(ip, username)}"
+        pair = self.store.get(pair_key) or {}
+        if self.trusted_seconds:
+            if pair.get('failures') or pair.get('trusted_until', 0) - now < self.trusted_seconds / 2:
+                self.store.update(pair_key, lambda state: ({'trusted_until': now + self.trusted_seconds}, None))
+        elif pair:
+            self.store.update(pair_key, lambda state: (None, None))
+
+    def metrics(self):
+        with self._metrics_lock:
+            data = dict(self._metrics)
+        data.update({
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "capacity": self.capacity,
+            "refill_per_second": self.refill_per_second,
+            "lockout_threshold": self.lockout_threshold,
+            "trusted_seconds": self.trusted_seconds,
+        })
+        return data
@@ -0,0 +1,250 @@
+from datetime import datetime, timedelta
+from sqlalchemy import Date, DateTime, and_, case, cast, delete, extract, func, insert, literal_column, or_, select, text, tuple_
+from flask import current_app
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+REPORT_CHECK_INS = 'check_in_hourly'
+REPORT_REGISTRATIONS = 'registration_daily'
+# Kunci pg_try_advisory_xact_lock agar hanya satu proses yang me-refresh laporan pada satu waktu
+REFRESH_LOCK_KEY = 730_370_001
+DIRTY_BUCKETS_PER_STATEMENT = 500
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class ReportService:
+    """
+    Laporan pasca-acara dari tabel ringkasan per bucket waktu (check-in per jam, funnel per hari registrasi).
+    Refresh inkremental hanya menghitung ulang bucket yang tersentuh sejak watermark terakhir:
+    - check-in: bucket (sesi, jam) dari attendance_event dengan id > watermark_id
+    - registrasi: hari registrasi peserta dengan updated_at >= watermark_at
+    Penghapusan peserta tidak menggeser updated_at, jadi jalankan `flask reports refresh --full` secara berkala
+    (mis. tiap malam) untuk merapikan bucket yang terdampak.
+    """
+
+    @property
+    def db(self):
+        return current_app.extensions['sqlalchemy']
+
+    def _config(self, name, default):
+        return current_app.config.get(name, default)
+
+    def _try_lock(self):
+        session = self.db.session
+        if session.get_bind().dialect.name != 'postgresql':
+            return True
+        return session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY}).scalar()
+
+    def _state(self, report_name):
+        from app.models import ReportRefreshState
+        state = self.db.session.get(ReportRefreshState, report_name)
+        if state is None:
+            state = ReportRefreshState(report_name=report_name)
+            self.db.session.add(state)
+        return state
+
+    def refresh(self, full=False):
+        """
+        Me-refresh semua laporan dalam satu transaksi. Mengembalikan jumlah bucket yang dihitung ulang per
+        laporan, atau None jika proses lain sedang me-refresh.
+        """
+        session = self.db.session
+        try:
+            if not self._try_lock():
+                session.rollback()
+                logger.info("Report refresh skipped: another process holds the refresh lock.")
+                return None
+            now = datetime.utcnow()
+            result = {
+                REPORT_CHECK_INS: self._refresh_check_ins(full, now),
+                REPORT_REGISTRATIONS: self._refresh_registrations(full, now),
+            }
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        logger.info(f"Reports refreshed ({'full' if full else 'incremental'}): {result}.")
+        return result
+
+    def _refresh_check_ins(self, full, now):
+        from app.models import AttendanceEvent, ReportCheckInHourly
+        session = self.db.session
+        state = self._state(REPORT_CHECK_INS)
+        summary = ReportCheckInHourly.__table__
+        # Unit ditulis literal (bukan bind parameter) agar ekspresi di SELECT dan GROUP BY identik
+        hour = func.date_trunc(literal_column("'hour'"), AttendanceEvent.timestamp, type_=DateTime)
+        max_id = session.query(func.max(AttendanceEvent.id)).scalar() or 0
+
+        if full or state.watermark_id is None:
+            session.execute(delete(summary))
+            criteria = [None]
+            refreshed = None
+        else:
+            # Transaksi check-in yang commit belakangan bisa memakai id di bawah watermark; overlap menutup celah itu
+            overlap = self._config('REPORT_EVENT_ID_OVERLAP', 1000)
+            dirty = session.execute(
+                select(AttendanceEvent.session_id, hour)
+                .where(AttendanceEvent.id > state.watermark_id - overlap)
+                .distinct()
+            ).all()
+            criteria = []
+            for chunk in _chunks(dirty, DIRTY_BUCKETS_PER_STATEMENT):
+                session.execute(delete(summary).where(
+                    tuple_(summary.c.session_id, summary.c.bucket).in_([tuple(row) for row in chunk])))
+                criteria.append(or_(*[
+                    and_(AttendanceEvent.session_id == session_id,
+                         AttendanceEvent.timestamp >= bucket,
+                         AttendanceEvent.timestamp < bucket + timedelta(hours=1))
+                    for session_id, bucket in chunk
+                ]))
+            refreshed = len(dirty)
+
+        for criterion in criteria:
+            query = select(AttendanceEvent.session_id, hour, func.count())
+            if criterion is not None:
+                query = query.where(criterion)
+            session.execute(insert(summary).from_select(
+                ['session_id', 'bucket', 'check_ins'],
+                query.group_by(AttendanceEvent.session_id, hour)
+            ))
+
+        state.watermark_id = max_id
+        state.refreshed_at = now
+        if refreshed is None:
+            refreshed = session.query(func.count()).select_from(summary).scalar()
+        return refreshed
+
+    def _refresh_registrations(self, full, now):
+        from app.models import Peserta, ReportRegistrationDaily
+        session = self.db.session
+        state = self._state(REPORT_REGISTRATIONS)
+        summary = ReportRegistrationDaily.__table__
+        day = func.date_trunc(literal_column("'day'"), Peserta.timestamp_registrasi, type_=DateTime)
+
+        if full or state.watermark_at is None:
+            session.execute(delete(summary))
+            criteria = [Peserta.timestamp_registrasi.isnot(None)]
+            refreshed = None
+        else:
+            # updated_at diisi aplikasi sebelum commit; overlap menutup celah transaksi yang commit belakangan
+            since = state.watermark_at - timedelta(seconds=self._config('REPORT_UPDATED_AT_OVERLAP_SECONDS', 60))
+            dirty_days = [row[0] for row in session.execute(
+                select(day).where(Peserta.updated_at >= since, Peserta.timestamp_registrasi.isnot(None)).distinct()
+            )]
+            criteria = []
+            for chunk in _chunks(dirty_days, DIRTY_BUCKETS_PER_STATEMENT):
+                session.execute(delete(summary).where(summary.c.day.in_([d.date() for d in chunk])))
+                criteria.append(or_(*[
+                    and_(Peserta.timestamp_registrasi >= d, Peserta.timestamp_registrasi < d + timedelta(days=1))
+                    for d in chunk
+                ]))
+            refreshed = len(dirty_days)
+
+        lag = extract('epoch', Peserta.timestamp_approval - Peserta.timestamp_registrasi)
+        for criterion in criteria:
+            session.execute(insert(summary).from_select(
+                ['day', 'registrations', 'pending', 'approved', 'rejected', 'attended',
+                 'approval_lag_count', 'approval_lag_seconds_sum', 'approval_lag_seconds_max'],
+                select(
+                    cast(day, Date),
+                    func.count(),
+                    func.sum(case((Peserta.status_pendaftaran == 'pending', 1), else_=0)),
+                    func.sum(case((Peserta.status_pendaftaran == 'registered', 1), else_=0)),
+                    func.sum(case((Peserta.status_pendaftaran == 'rejected', 1), else_=0)),
+                    func.sum(case((Peserta.status_kehadiran.is_(True), 1), else_=0)),
+                    func.count(Peserta.timestamp_approval),
+                    func.coalesce(func.sum(lag), 0),
+                    func.max(lag),
+                ).where(criterion).group_by(day)
+            ))
+
+        state.watermark_at = now
+        state.refreshed_at = now
+        if refreshed is None:
+            refreshed = session.query(func.count()).select_from(summary).scalar()
+        return refreshed
+
+    def freshness(self, report_name):
+        """
+        Indikator staleness yang disertakan di setiap response laporan.
+        """
+        from app.models import ReportRefreshState
+        state = self.db.session.get(ReportRefreshState, report_name)
+        refreshed_at = state.refreshed_at if state else None
+        max_staleness = self._config('REPORT_MAX_STALENESS_SECONDS', 900)
+        stale_seconds = (datetime.utcnow() - refreshed_at).total_seconds() if refreshed_at else None
+        return {
+            "refreshed_at": refreshed_at.isoformat() if refreshed_at else None,
+            "stale_seconds": round(stale_seconds, 1) if stale_seconds is not None else None,
+            "stale": stale_seconds is None or stale_seconds > max_staleness,
+        }
+
+    def get_check_ins(self, session_id=None, since=None, until=None):
+        from app.models import ReportCheckInHourly
+        query = self.db.session.query(ReportCheckInHourly)
+        if session_id:
+            query = query.filter(ReportCheckInHourly.session_id == session_id)
+        if since:
+            query = query.filter(ReportCheckInHourly.bucket >= since)
+        if until:
+            query = query.filter(ReportCheckInHourly.bucket < until)
+        return query.order_by(ReportCheckInHourly.bucket, ReportCheckInHourly.session_id).all()
+
+    def get_registrations(self, since=None, until=None):
+        from app.models import ReportRegistrationDaily
+        query = self.db.session.query(ReportRegistrationDaily)
+        if since:
+            query = query.filter(ReportRegistrationDaily.day >= since)
+        if until:
+            query = query.filter(ReportRegistrationDaily.day < until)
+        return query.order_by(ReportRegistrationDaily.day).all()
+
+
+class ReportRefreshScheduler:
+    """
+    Thread background yang menjalankan refresh inkremental setiap REPORT_REFRESH_INTERVAL_SECONDS.
+    Setiap worker menjalankan scheduler sendiri; advisory lock di refresh() memastikan hanya satu yang bekerja.
+    """
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='report-refresh', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    ReportService().refresh()
+                except Exception:
+                    logger.error("Scheduled report refresh failed.", exc_info=True)
+
+
+def start_report_scheduler(app):
+    interval = app.config.get('REPORT_REFRESH_INTERVAL_SECONDS', 300)
+    if not interval:
+        return
+    scheduler = ReportRefreshScheduler(app, interval)
+    scheduler.start()
+    app.extensions['report_scheduler'] = (os.getpid(), scheduler)
+
+
+def stop_report_scheduler(app):
+    pid, scheduler = app.extensions.pop('report_scheduler', (None, None))
+    if scheduler is not None and pid == os.getpid():
+        scheduler.stop(timeout=5)
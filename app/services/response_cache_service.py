@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Tabel yang versinya dinaikkan otomatis setiap kali ada insert/update/delete lewat ORM
+VERSIONED_TABLES = {'peserta'}
+
+
+def get_table_version(session, table_name):
+    """
+    Membaca versi global sebuah tabel (satu lookup PK, jauh lebih murah dari query listing).
+    """
+    version = session.execute(
+        text("SELECT version FROM table_version WHERE table_name = :table_name"),
+        {"table_name": table_name}
+    ).scalar()
+    return version or 0
+
+
+def bump_table_version(connection, table_name):
+    """
+    Menaikkan versi tabel dalam transaksi yang sedang berjalan.
+    Panggil fungsi ini juga dari jalur penulisan yang memakai SQL mentah / bulk update.
+    """
+    result = connection.execute(
+        text("UPDATE table_version SET version = version + 1 WHERE table_name = :table_name"),
+        {"table_name": table_name}
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            text("INSERT INTO table_version (table_name, version) VALUES (:table_name, 1)"),
+            {"table_name": table_name}
+        )
+
+
+def _bump_versions_after_flush(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table_name = getattr(obj, '__tablename__', None)
+        if table_name in VERSIONED_TABLES and (obj not in session.dirty or session.is_modified(obj)):
+            changed.add(table_name)
+    for table_name in changed:
+        bump_table_version(session.connection(), table_name)
+
+
+def register_table_version_listener():
+    if not event.contains(Session, 'after_flush', _bump_versions_after_flush):
+        event.listen(Session, 'after_flush', _bump_versions_after_flush)
+
+
+def query_fingerprint(args):
+    """
+    Fingerprint stabil dari parameter query (urutan parameter tidak berpengaruh).
+    """
+    raw = '&'.join(f"{key}={value}" for key, value in sorted(args.items(multi=True)))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    Cache LRU kecil per proses untuk payload response, diberi tag versi tabel.
+    Entri dianggap basi begitu versi tabel berubah, jadi tidak perlu invalidasi eksplisit.
+    """
+
+    def __init__(self, app_config):
+        self.enabled = app_config.get('RESPONSE_CACHE_ENABLED', True)
+        self.max_entries = app_config.get('RESPONSE_CACHE_MAX_ENTRIES', 256)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, payload):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (version, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 def log_error(message, level='ERROR', tb=None):
     # Defer import of db to avoid RuntimeError when module is loaded
     # Kita tetap impor db di sini karena log_error bisa dipanggil di luar konteks request Flask
-    from app.__init__ import db 
+    from app import db 
     try:
         error_entry = LogError(message=message, level=level, traceback=tb)
         db.session.add(error_entry)
@@ -44,7 +44,7 @@ def handle_errors(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Defer import of db to avoid RuntimeError when module is loaded
-        from app.__init__ import db 
+        from app import db 
         try:
             return f(*args, **kwargs)
         except Exception as e:
@@ -64,34 +64,3 @@ def handle_errors(f):
             
             return jsonify(response_data), 500
     return decorated_function
-
-def generate_confirmation_message(peserta, qr_code_url=None):
-    message = f"""
-    <html>
-    <body>
-        <p>Halo <strong>{peserta.nama}</strong>,</p>
-        <p>Terima kasih telah mendaftar di acara kami!</p>
-        <p><strong>Detail Pendaftaran Anda:</strong></p>
-        <ul>
-            <li>Nama: {peserta.nama}</li>
-            <li>Email: {peserta.email}</li>
-            <li>Status Pendaftaran: <strong>{peserta.status_pendaftaran.capitalize()}</strong></li>
-        </ul>
-    """
-    if peserta.status_pendaftaran == 'registered' and qr_code_url:
-        message += f"""
-        <p>Untuk absensi di lokasi, silakan gunakan QR Code berikut:</p>
-        <p><img src="{qr_code_url}" alt="QR Code Absensi" width="200"></p>
-        <p>Atau akses langsung di: <a href="{qr_code_url}">{qr_code_url}</a></p>
-        <p>Kami tunggu kehadiran Anda!</p>
-        """
-    elif peserta.status_pendaftaran == 'pending':
-        message += """
-        <p>Pendaftaran Anda sedang kami tinjau. Kami akan mengirimkan konfirmasi lebih lanjut setelah disetujui.</p>
-        """
-    message += """
-        <p>Salam Hormat,<br>Tim RegiSync</p>
-    </body>
-    </html>
-    """
-    return message
\ No newline at end of file
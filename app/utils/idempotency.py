@@ -0,0 +1,134 @@
+from functools import wraps
+from datetime import datetime, timedelta
+from flask import request, jsonify, current_app, make_response
+from sqlalchemy.exc import IntegrityError
+import hashlib
+import logging
+
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(*parts):
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _release(db, key_hash):
+    """
+    Menghapus placeholder supaya client boleh mengulang request yang gagal.
+    """
+    db.session.rollback()
+    db.session.query(IdempotencyKey).filter_by(key_hash=key_hash).delete()
+    db.session.commit()
+
+
+def _in_progress():
+    response = jsonify({"message": "A request with this Idempotency-Key is still being processed"})
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def idempotent(f):
+    """
+    Dukungan header `Idempotency-Key`: request ulang dengan key yang sama mendapat response yang
+    tersimpan tanpa menjalankan handler lagi. Tanpa header, handler berjalan seperti biasa.
+    Pasang di bawah @handle_errors agar error di handler tetap ditangani seperti endpoint lain.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        if not idempotency_key:
+            return f(*args, **kwargs)
+
+        from app import db
+        admin = getattr(request, 'admin', None)
+        key_hash = _hash(admin.username if admin else '', request.method, request.path, idempotency_key)
+        request_hash = _hash(request.get_data(as_text=True))
+        now = datetime.utcnow()
+
+        # Placeholder hanya mendapat lease singkat (sekitar timeout request). Jika worker mati sebelum response
+        # disimpan, key bisa diklaim ulang setelah lease habis, bukan terkunci selama TTL penuh.
+        lease = current_app.config.get('IDEMPOTENCY_LOCK_SECONDS', 60)
+        existing = db.session.query(IdempotencyKey).get(key_hash)
+        if existing and existing.expires_at <= now:
+            # Dibaca sebelum commit: setelah commit `existing` di-expire dan dimuat ulang dengan nilai baru (None)
+            abandoned = existing.status_code is None
+            # Response kedaluwarsa atau placeholder yatim: UPDATE bersyarat agar hanya satu retry yang menang
+            claimed = db.session.query(IdempotencyKey).filter(
+                IdempotencyKey.key_hash == key_hash, IdempotencyKey.expires_at <= now
+            ).update({
+                "request_hash": request_hash,
+                "status_code": None,
+                "content_type": None,
+                "response_body": None,
+                "expires_at": now + timedelta(seconds=lease),
+            }, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                return _in_progress()
+            if abandoned:
+                logger.warning(f"Reclaimed abandoned Idempotency-Key placeholder {key_hash[:12]}.")
+        elif existing:
+            if existing.request_hash != request_hash:
+                return jsonify({"message": "Idempotency-Key was already used with a different request body"}), 422
+            if existing.status_code is None:
+                return _in_progress()
+            response = current_app.response_class(existing.response_body, status=existing.status_code,
+                                                  content_type=existing.content_type)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        else:
+            # Placeholder dicommit dulu; PK unik mencegah dua request paralel dengan key sama sama-sama jalan
+            try:
+                db.session.add(IdempotencyKey(key_hash=key_hash, request_hash=request_hash,
+                                              expires_at=now + timedelta(seconds=lease)))
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                return _in_progress()
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            _release(db, key_hash)
+            raise
+
+        # Error server tidak disimpan agar retry berikutnya benar-benar diproses ulang
+        if response.status_code >= 500 or response.direct_passthrough:
+            _release(db, key_hash)
+            return response
+
+        # TTL penuh baru berlaku setelah response tersimpan
+        ttl = current_app.config.get('IDEMPOTENCY_TTL_SECONDS', 86400)
+        db.session.query(IdempotencyKey).filter_by(key_hash=key_hash).update({
+            "status_code": response.status_code,
+            "content_type": response.content_type,
+            "response_body": response.get_data(as_text=True),
+            "expires_at": datetime.utcnow() + timedelta(seconds=ttl),
+        })
+        db.session.commit()
+        return response
+    return decorated_function
+
+
+def purge_expired_idempotency_keys(batch_size=5000):
+    """
+    Menghapus key yang sudah kedaluwarsa per batch agar tidak ada lock panjang.
+    """
+    from app import db
+    total = 0
+    while True:
+        expired = db.session.query(IdempotencyKey.key_hash).filter(
+            IdempotencyKey.expires_at <= datetime.utcnow()
+        ).limit(batch_size).subquery()
+        deleted = db.session.query(IdempotencyKey).filter(
+            IdempotencyKey.key_hash.in_(db.session.query(expired.c.key_hash))
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            break
+    logger.info(f"Purged {total} expired idempotency key(s).")
+    return total
@@ -0,0 +1,55 @@
+import re
+import unicodedata
+
+# Domain yang mengabaikan titik di local-part (budi.s@gmail.com == budis@gmail.com)
+GMAIL_DOMAINS = {'gmail.com', 'googlemail.com'}
+NON_DIGIT_PATTERN = re.compile(r'\D+')
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+DEFAULT_COUNTRY_CODE = '62'
+
+
+def normalize_email_key(email):
+    """
+    Kunci pencocokan email: huruf kecil, tanpa tag '+...', dan tanpa titik untuk alamat Gmail.
+    Hanya untuk deteksi duplikat; email asli peserta tidak diubah.
+    """
+    if not email:
+        return None
+    local, _, domain = email.strip().lower().rpartition('@')
+    if not local or not domain:
+        return None
+    local = local.split('+', 1)[0]
+    if domain in GMAIL_DOMAINS:
+        local, domain = local.replace('.', ''), 'gmail.com'
+    return f"{local}@{domain}"[:100]
+
+
+def normalize_phone(phone, country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Nomor telepon dalam format E.164 ('0812-3456 789', '+62 812 3456789' -> '+628123456789').
+    Mengembalikan None jika nomor terlalu pendek/panjang untuk dianggap valid.
+    """
+    if not phone:
+        return None
+    digits = NON_DIGIT_PATTERN.sub('', phone)
+    if digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = country_code + digits[1:]
+    elif digits.startswith('8'):
+        digits = country_code + digits
+    if not 8 <= len(digits) <= 15:
+        return None
+    return '+' + digits
+
+
+def normalize_nama_key(nama):
+    """
+    Kunci nama: tanpa aksen dan tanda baca, huruf kecil, token diurutkan
+    ('Santoso, Budi' dan 'budi santoso' -> 'budi santoso').
+    """
+    if not nama:
+        return None
+    ascii_nama = unicodedata.normalize('NFKD', nama).encode('ascii', 'ignore').decode('ascii')
+    tokens = NON_ALNUM_PATTERN.sub(' ', ascii_nama.lower()).split()
+    return ' '.join(sorted(tokens))[:100] or None
@@ -0,0 +1,155 @@
+from collections import Counter
+import re
+
+from app.utils.normalize import normalize_phone
+
+# Dikompilasi sekali saat import; validasi batch hanya memanggil .fullmatch per nilai
+EMAIL_PATTERN = re.compile(
+    r"[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+"
+    r"@[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+"
+)
+PHONE_PATTERN = re.compile(r"\+?[0-9 ().-]{8,25}")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Sesuai panjang kolom di app/models.py
+NAMA_MAX_LENGTH = 100
+EMAIL_MAX_LENGTH = 100
+STATUS_PENDAFTARAN_VALUES = ('pending', 'registered', 'rejected')
+PESERTA_FIELDS = ('nama', 'email', 'nomor_telepon', 'status_pendaftaran', 'status_kehadiran')
+REQUIRED_FIELDS = ('nama', 'email')
+
+
+def _check_nama(values):
+    cleaned, errors = [], []
+    for i, value in enumerate(values):
+        if not isinstance(value, str) or not value.strip():
+            errors.append((i, "must be a non-empty string"))
+            cleaned.append(None)
+            continue
+        value = WHITESPACE_PATTERN.sub(' ', value).strip()
+        if len(value) > NAMA_MAX_LENGTH:
+            errors.append((i, f"must be at most {NAMA_MAX_LENGTH} characters"))
+        cleaned.append(value)
+    return cleaned, errors
+
+
+def _check_email(values):
+    match = EMAIL_PATTERN.fullmatch
+    cleaned, errors = [], []
+    for i, value in enumerate(values):
+        if not isinstance(value, str) or not value.strip():
+            errors.append((i, "must be a non-empty string"))
+            cleaned.append(None)
+            continue
+        local, _, domain = value.strip().rpartition('@')
+        value = f"{local}@{domain.lower()}" if local else value.strip()
+        if len(value) > EMAIL_MAX_LENGTH:
+            errors.append((i, f"must be at most {EMAIL_MAX_LENGTH} characters"))
+        elif not match(value):
+            errors.append((i, "is not a valid email address"))
+        cleaned.append(value)
+
+    # Email unik di database; duplikat di dalam batch yang sama dilaporkan di sini, bukan sebagai IntegrityError
+    counts = Counter(value.lower() for value in cleaned if value)
+    if any(count > 1 for count in counts.values()):
+        first_row = {}
+        for i, value in enumerate(cleaned):
+            if value and counts[value.lower()] > 1:
+                key = value.lower()
+                if key in first_row:
+                    errors.append((i, f"duplicates the email in row {first_row[key]}"))
+                else:
+                    first_row[key] = i
+    return cleaned, errors
+
+
+def _check_nomor_telepon(values):
+    match = PHONE_PATTERN.fullmatch
+    cleaned, errors = [], []
+    for i, value in enumerate(values):
+        if value is None or (isinstance(value, str) and not value.strip()):
+            cleaned.append(None)
+            continue
+        phone = normalize_phone(value) if isinstance(value, str) and match(value.strip()) else None
+        if phone is None:
+            errors.append((i, "is not a valid phone number"))
+        cleaned.append(phone)
+    return cleaned, errors
+
+
+def _check_status_pendaftaran(values):
+    allowed = set(STATUS_PENDAFTARAN_VALUES)
+    cleaned, errors = [], []
+    for i, value in enumerate(values):
+        # Cek tipe dulu: list/dict dari JSON tidak bisa di-hash untuk tes keanggotaan set
+        if not isinstance(value, str):
+            errors.append((i, "must be a string"))
+            cleaned.append(None)
+            continue
+        value = value.strip().lower()
+        if value not in allowed:
+            errors.append((i, f"must be one of {', '.join(STATUS_PENDAFTARAN_VALUES)}"))
+        cleaned.append(value)
+    return cleaned, errors
+
+
+def _check_status_kehadiran(values):
+    errors = [(i, "must be a boolean") for i, value in enumerate(values) if not isinstance(value, bool)]
+    return list(values), errors
+
+
+CHECKS = {
+    'nama': _check_nama,
+    'email': _check_email,
+    'nomor_telepon': _check_nomor_telepon,
+    'status_pendaftaran': _check_status_pendaftaran,
+    'status_kehadiran': _check_status_kehadiran,
+}
+
+
+def validate_peserta_columns(columns, partial=False):
+    """
+    Validasi batch dalam format kolom ({"email": [...], "nama": [...]}), satu pass per kolom.
+    Mengembalikan (kolom_bersih, errors) dengan errors berupa list {"row", "field", "message"} terurut per baris;
+    baris yang valid tidak pernah memunculkan exception. Kolom yang tidak dikenal diabaikan.
+    Raise ValueError jika bentuk input salah (panjang kolom berbeda, kolom wajib tidak ada).
+    """
+    columns = {field: list(values) for field, values in columns.items() if field in CHECKS}
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same number of rows")
+    if not partial:
+        missing = [field for field in REQUIRED_FIELDS if field not in columns]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    cleaned, errors = {}, []
+    for field, values in columns.items():
+        cleaned[field], field_errors = CHECKS[field](values)
+        errors.extend({"row": row, "field": field, "message": message} for row, message in field_errors)
+    errors.sort(key=lambda error: (error["row"], PESERTA_FIELDS.index(error["field"])))
+    return cleaned, errors
+
+
+def records_to_columns(records):
+    """
+    [{"nama": ..., "email": ...}, ...] -> {"nama": [...], "email": [...]}; field yang tidak ada di sebuah
+    record diisi None agar tetap divalidasi (mis. email kosong).
+    """
+    fields = {field for record in records if isinstance(record, dict) for field in record if field in CHECKS}
+    return {field: [record.get(field) if isinstance(record, dict) else None for record in records]
+            for field in fields}
+
+
+def validate_peserta(record, partial=False):
+    """
+    Validasi satu record peserta. Dengan partial=True hanya field yang dikirim yang diperiksa
+    (dipakai untuk edit). Mengembalikan (record_bersih, errors) dengan errors berupa dict field -> pesan.
+    """
+    errors = {}
+    if not partial:
+        errors.update({field: "is required" for field in REQUIRED_FIELDS if field not in record})
+    columns = {field: [value] for field, value in record.items() if field in CHECKS}
+    cleaned, column_errors = validate_peserta_columns(columns, partial=True)
+    errors.update({error["field"]: error["message"] for error in column_errors})
+    return {field: values[0] for field, values in cleaned.items()}, errors
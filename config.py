@@ -17,8 +17,8 @@ class Config:
         "port": "5432"
     }
 
-    # Menggunakan DB_CONFIG untuk membuat SQLALCHEMY_DATABASE_URI
-    SQLALCHEMY_DATABASE_URI = (
+    # Menggunakan DB_CONFIG untuk membuat SQLALCHEMY_DATABASE_URI (bisa di-override dengan DATABASE_URL)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or (
         f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@"
         f"{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
     )
@@ -31,8 +31,74 @@ class Config:
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') is not None
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     ADMINS = ['your-email@example.com']
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT') or 10) # detik, timeout socket SMTP
+    # Jumlah email per batch mailout: diklaim, dikirim lewat satu koneksi SMTP, lalu ditandai terkirim
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE') or 100)
+    # Lama klaim batch mailout (detik); batch dari worker yang mati diambil ulang setelah klaimnya lewat
+    MAILOUT_CLAIM_SECONDS = int(os.environ.get('MAILOUT_CLAIM_SECONDS') or 1800)
 
     # Konfigurasi untuk batasan token
     JWT_ACCESS_TOKEN_EXPIRES_MINUTES = 30 # Contoh: 30 menit
-    JWT_REFRESH_TOKEN_EXPIRES_DAYS = 7    # Contoh: 7 hari
\ No newline at end of file
+    JWT_REFRESH_TOKEN_EXPIRES_DAYS = 7    # Contoh: 7 hari
+
+    # Konfigurasi logging & retensi tabel log_error (dipartisi per bulan)
+    # 'size' = RotatingFileHandler (satu proses, mis. `flask run`); 'external' = WatchedFileHandler, rotasi oleh
+    # logrotate (wajib jika beberapa proses menulis file yang sama, lihat gunicorn.conf.py), mis.:
+    #   /path/RegiSync/logs/regisync.log { daily rotate 10 compress missingok notifempty }
+    LOG_FILE_ROTATION = os.environ.get('LOG_FILE_ROTATION') or 'size'
+    LOG_FILE_MAX_BYTES = int(os.environ.get('LOG_FILE_MAX_BYTES') or 10 * 1024 * 1024) # 10 MB per file
+    LOG_FILE_BACKUP_COUNT = int(os.environ.get('LOG_FILE_BACKUP_COUNT') or 10)
+    LOG_ERROR_RETENTION_MONTHS = int(os.environ.get('LOG_ERROR_RETENTION_MONTHS') or 6)
+    LOG_ERROR_PARTITION_PREMAKE_MONTHS = 3
+
+    # Konfigurasi throttling endpoint otentikasi (dicek sebelum password di-hash)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+    RATE_LIMIT_CAPACITY = int(os.environ.get('RATE_LIMIT_CAPACITY') or 30) # burst per IP / kegagalan per username
+    RATE_LIMIT_REFILL_PER_SECOND = float(os.environ.get('RATE_LIMIT_REFILL_PER_SECOND') or 1.0)
+    RATE_LIMIT_LOCKOUT_THRESHOLD = int(os.environ.get('RATE_LIMIT_LOCKOUT_THRESHOLD') or 5) # gagal beruntun sebelum dikunci
+    RATE_LIMIT_LOCKOUT_BASE_SECONDS = 30 # lama lockout pertama, berlipat dua tiap kegagalan berikutnya
+    RATE_LIMIT_LOCKOUT_MAX_SECONDS = 3600
+    # Pasangan (IP, username) yang baru berhasil login tidak memakai token bucket selama ini (0 = nonaktif)
+    RATE_LIMIT_TRUSTED_SECONDS = int(os.environ.get('RATE_LIMIT_TRUSTED_SECONDS') or 900)
+    # Path file SQLite untuk berbagi state limiter antar worker; kosong = per-proses di memori
+    RATE_LIMIT_STORE_PATH = os.environ.get('RATE_LIMIT_STORE_PATH')
+
+    # Cache payload listing/detail admin (per proses, divalidasi dengan versi tabel)
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() != 'false'
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES') or 256)
+
+    # Lama response untuk header Idempotency-Key disimpan (check-in, approve)
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 24 * 3600)
+    # Lease placeholder selama request pertama diproses (sekitar timeout worker); setelah itu key boleh diklaim ulang
+    IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get('IDEMPOTENCY_LOCK_SECONDS') or 60)
+
+    # Sesi default untuk check-in jika scanner tidak mengirim field 'session'
+    DEFAULT_ATTENDANCE_SESSION = os.environ.get('DEFAULT_ATTENDANCE_SESSION') or 'main'
+
+    # Jawaban Google Forms yang dipromosikan menjadi kolom ber-index: nama -> path JSON (dipisah titik).
+    # Jalankan `flask forms promote` setelah mengubah daftar ini, mis. {'workshop': 'Pilihan Workshop'}
+    PROMOTED_FORM_FIELDS = {}
+
+    # Deteksi pendaftaran ganda (`flask dedupe scan`)
+    DEDUPE_MIN_NAME_SCORE = float(os.environ.get('DEDUPE_MIN_NAME_SCORE') or 0.85) # kemiripan nama minimum untuk blok telepon
+    DEDUPE_MAX_BLOCK_SIZE = 50 # blok lebih besar (mis. nomor placeholder) dilewati
+    DEDUPE_BATCH_SIZE = 5000
+    DEDUPE_MERGE_BATCH_SIZE = 500
+
+    # Profiling on-demand untuk endpoint admin (header `X-Profile: 1|json|pstats` atau `?_profile=...`)
+    PROFILE_RING_SIZE = int(os.environ.get('PROFILE_RING_SIZE') or 20) # profil terakhir yang disimpan per worker
+    PROFILE_TOP_FUNCTIONS = 50
+    PROFILE_SQL_MAX_STATEMENTS = 500
+
+    # Laporan pasca-acara dari tabel ringkasan (`flask reports refresh`, atau scheduler di setiap worker gunicorn)
+    REPORT_REFRESH_INTERVAL_SECONDS = int(os.environ.get('REPORT_REFRESH_INTERVAL_SECONDS') or 300) # 0 = scheduler mati
+    REPORT_MAX_STALENESS_SECONDS = int(os.environ.get('REPORT_MAX_STALENESS_SECONDS') or 900) # batas 'stale' di response
+    REPORT_EVENT_ID_OVERLAP = 1000
+    REPORT_UPDATED_AT_OVERLAP_SECONDS = 60
+
+    # Arsip data acara yang sudah selesai (`flask archive ...`), disimpan sebagai file terkompresi
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR') or os.path.join(basedir, 'archive')
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 10000) # baris per file part
+    ARCHIVE_DELETE_BATCH_SIZE = int(os.environ.get('ARCHIVE_DELETE_BATCH_SIZE') or 1000) # baris per transaksi DELETE
\ No newline at end of file
@@ -10,9 +10,48 @@ CREATE TABLE IF NOT EXISTS peserta (
     qr_code_data VARCHAR(255) UNIQUE,
     timestamp_registrasi TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     timestamp_kehadiran TIMESTAMP,
-    data_mentah_google_forms JSONB
+    timestamp_approval TIMESTAMP,
+    data_mentah_google_forms JSONB,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    row_version INTEGER NOT NULL DEFAULT 1,
+    email_key VARCHAR(100),
+    phone_key VARCHAR(20),
+    nama_key VARCHAR(100),
+    confirmation_sent_at TIMESTAMP,
+    confirmation_claimed_at TIMESTAMP
 );
 
+-- Index GIN untuk filter containment (@>) pada jawaban Google Forms
+CREATE INDEX IF NOT EXISTS ix_peserta_form_answers_gin ON peserta USING gin (data_mentah_google_forms jsonb_path_ops);
+
+-- Kunci ternormalisasi untuk blocking deteksi duplikat (`flask dedupe scan`)
+CREATE INDEX IF NOT EXISTS ix_peserta_email_key ON peserta (email_key);
+CREATE INDEX IF NOT EXISTS ix_peserta_phone_key ON peserta (phone_key);
+CREATE INDEX IF NOT EXISTS ix_peserta_nama_key ON peserta (nama_key);
+
+-- Dipakai refresh inkremental laporan
+CREATE INDEX IF NOT EXISTS ix_peserta_timestamp_registrasi ON peserta (timestamp_registrasi);
+CREATE INDEX IF NOT EXISTS ix_peserta_updated_at ON peserta (updated_at);
+
+-- Antrean mailout konfirmasi: peserta 'registered' yang email konfirmasinya belum terkirim
+CREATE INDEX IF NOT EXISTS ix_peserta_confirmation_pending ON peserta (id)
+    WHERE status_pendaftaran = 'registered' AND confirmation_sent_at IS NULL;
+
+-- PNG QR yang dibuat sekali saat approval (dipakai mailout dan endpoint QR)
+CREATE TABLE IF NOT EXISTS peserta_qr_image (
+    peserta_id VARCHAR(36) PRIMARY KEY REFERENCES peserta(id) ON DELETE CASCADE,
+    qr_code_data VARCHAR(255) NOT NULL,
+    png BYTEA NOT NULL,
+    created_at TIMESTAMP
+);
+
+-- Versi global per tabel untuk ETag / invalidasi cache response admin
+CREATE TABLE IF NOT EXISTS table_version (
+    table_name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO table_version (table_name, version) VALUES ('peserta', 0) ON CONFLICT (table_name) DO NOTHING;
+
 CREATE TABLE IF NOT EXISTS admin (
     id SERIAL PRIMARY KEY,
     username VARCHAR(50) UNIQUE NOT NULL,
@@ -20,12 +59,89 @@ CREATE TABLE IF NOT EXISTS admin (
     role VARCHAR(50) DEFAULT 'admin'
 );
 
+-- log_error dipartisi per bulan; partisi baru dibuat dan partisi lama dibuang dengan `flask logs prune`
 CREATE TABLE IF NOT EXISTS log_error (
-    id SERIAL PRIMARY KEY,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    id SERIAL,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     message TEXT NOT NULL,
     level VARCHAR(20) DEFAULT 'ERROR',
-    traceback TEXT
+    traceback TEXT,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+CREATE TABLE IF NOT EXISTS log_error_default PARTITION OF log_error DEFAULT;
+CREATE INDEX IF NOT EXISTS ix_log_error_timestamp ON log_error (timestamp);
+CREATE INDEX IF NOT EXISTS ix_log_error_level_timestamp ON log_error (level, timestamp);
+
+-- Log check-in append-only per sesi; index unik mencegah check-in ganda dalam satu sesi
+CREATE TABLE IF NOT EXISTS attendance_event (
+    id BIGSERIAL PRIMARY KEY,
+    peserta_id VARCHAR(36) NOT NULL REFERENCES peserta(id) ON DELETE CASCADE,
+    session_id VARCHAR(50) NOT NULL,
+    scanner VARCHAR(100),
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_attendance_event_peserta_session UNIQUE (peserta_id, session_id)
+);
+CREATE INDEX IF NOT EXISTS ix_attendance_event_session_timestamp ON attendance_event (session_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS attendance_session_rollup (
+    session_id VARCHAR(50) PRIMARY KEY,
+    total_check_ins BIGINT NOT NULL DEFAULT 0,
+    first_check_in TIMESTAMP,
+    last_check_in TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Response tersimpan untuk request dengan header Idempotency-Key
+CREATE TABLE IF NOT EXISTS idempotency_key (
+    key_hash VARCHAR(64) PRIMARY KEY,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code SMALLINT,
+    content_type VARCHAR(100),
+    response_body TEXT,
+    expires_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_key_expires_at ON idempotency_key (expires_at);
+
+-- Pasangan peserta yang diduga duplikat (diisi `flask dedupe scan`, ditinjau lewat /admin/peserta/duplicates)
+CREATE TABLE IF NOT EXISTS duplicate_candidate (
+    id BIGSERIAL PRIMARY KEY,
+    peserta_a_id VARCHAR(36) NOT NULL REFERENCES peserta(id) ON DELETE CASCADE,
+    peserta_b_id VARCHAR(36) NOT NULL REFERENCES peserta(id) ON DELETE CASCADE,
+    reasons VARCHAR(50) NOT NULL,
+    score DOUBLE PRECISION NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'open',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_duplicate_candidate_pair UNIQUE (peserta_a_id, peserta_b_id)
+);
+CREATE INDEX IF NOT EXISTS ix_duplicate_candidate_peserta_b_id ON duplicate_candidate (peserta_b_id);
+CREATE INDEX IF NOT EXISTS ix_duplicate_candidate_status_score ON duplicate_candidate (status, score);
+
+-- Tabel ringkasan laporan, dihitung ulang per bucket waktu (`flask reports refresh`)
+CREATE TABLE IF NOT EXISTS report_check_in_hourly (
+    session_id VARCHAR(50) NOT NULL,
+    bucket TIMESTAMP NOT NULL,
+    check_ins BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS report_registration_daily (
+    day DATE PRIMARY KEY,
+    registrations BIGINT NOT NULL DEFAULT 0,
+    pending BIGINT NOT NULL DEFAULT 0,
+    approved BIGINT NOT NULL DEFAULT 0,
+    rejected BIGINT NOT NULL DEFAULT 0,
+    attended BIGINT NOT NULL DEFAULT 0,
+    approval_lag_count BIGINT NOT NULL DEFAULT 0,
+    approval_lag_seconds_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    approval_lag_seconds_max DOUBLE PRECISION
+);
+
+CREATE TABLE IF NOT EXISTS report_refresh_state (
+    report_name VARCHAR(50) PRIMARY KEY,
+    watermark_id BIGINT,
+    watermark_at TIMESTAMP,
+    refreshed_at TIMESTAMP
 );
 
 -- Contoh admin user (Anda akan membuatnya melalui API /admin/register setelah aplikasi berjalan)
@@ -0,0 +1,45 @@
+# Konfigurasi gunicorn untuk production: gunicorn -c gunicorn.conf.py wsgi:app
+# Semua nilai bisa di-override lewat environment variable.
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread') # gthread, sync, atau gevent
+
+if worker_class == 'gevent':
+    # Dengan preload, aplikasi diimpor di master sebelum gunicorn mem-patch worker,
+    # jadi monkey patching harus dilakukan paling awal di sini.
+    from gevent import monkey
+    monkey.patch_all()
+
+# Semua worker menulis logs/regisync.log: rotasi diserahkan ke logrotate, bukan RotatingFileHandler per worker.
+# Diset di sini karena aplikasi di-preload setelah file ini dibaca.
+os.environ.setdefault('LOG_FILE_ROTATION', 'external')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4) # hanya dipakai worker gthread
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS') or 1000) # hanya dipakai worker gevent
+
+# Aplikasi di-load sekali di master lalu di-fork: worker baru (termasuk respawn setelah max_requests) start lebih cepat
+preload_app = True
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 2000)
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER') or 200)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') # None = access log dimatikan
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # worker.app.wsgi() mengembalikan aplikasi Flask yang sudah di-preload oleh master
+    from app.lifecycle import init_worker
+    init_worker(worker.app.wsgi())
+
+
+def worker_exit(server, worker):
+    from app.lifecycle import shutdown_worker
+    shutdown_worker(worker.app.wsgi())
@@ -0,0 +1,91 @@
+"""partition log_error by month
+
+Revision ID: 3f2a9c1d7e01
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7e01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tabel lama di-rename, lalu dibuat ulang sebagai tabel induk yang dipartisi per bulan
+    op.execute("ALTER TABLE log_error RENAME TO log_error_legacy")
+    op.execute("ALTER INDEX IF EXISTS log_error_pkey RENAME TO log_error_legacy_pkey")
+    op.execute("ALTER SEQUENCE IF EXISTS log_error_id_seq RENAME TO log_error_legacy_id_seq")
+
+    op.execute("""
+        CREATE TABLE log_error (
+            id SERIAL,
+            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            message TEXT NOT NULL,
+            level VARCHAR(20) DEFAULT 'ERROR',
+            traceback TEXT,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("CREATE INDEX ix_log_error_timestamp ON log_error (timestamp)")
+    op.execute("CREATE INDEX ix_log_error_level_timestamp ON log_error (level, timestamp)")
+
+    # Partisi untuk setiap bulan yang sudah punya data, plus bulan ini dan 3 bulan ke depan
+    op.execute("""
+        DO $$
+        DECLARE
+            bulan DATE;
+            awal DATE;
+            akhir DATE;
+        BEGIN
+            SELECT LEAST(
+                COALESCE(date_trunc('month', MIN(timestamp))::date, date_trunc('month', now())::date),
+                date_trunc('month', now())::date
+            ) INTO awal FROM log_error_legacy;
+            akhir := (date_trunc('month', now()) + interval '3 months')::date;
+            bulan := awal;
+            WHILE bulan <= akhir LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF log_error FOR VALUES FROM (%L) TO (%L)',
+                    'log_error_' || to_char(bulan, 'YYYYMM'), bulan, (bulan + interval '1 month')::date
+                );
+                bulan := (bulan + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    # Partisi default menampung baris di luar rentang agar insert tidak pernah gagal
+    op.execute("CREATE TABLE log_error_default PARTITION OF log_error DEFAULT")
+
+    op.execute("""
+        INSERT INTO log_error (id, timestamp, message, level, traceback)
+        SELECT id, COALESCE(timestamp, CURRENT_TIMESTAMP), message, level, traceback
+        FROM log_error_legacy
+    """)
+    op.execute("SELECT setval('log_error_id_seq', COALESCE((SELECT MAX(id) FROM log_error), 0) + 1, false)")
+    op.execute("DROP TABLE log_error_legacy")
+
+
+def downgrade():
+    op.execute("ALTER TABLE log_error RENAME TO log_error_partitioned")
+    op.execute("ALTER INDEX log_error_pkey RENAME TO log_error_partitioned_pkey")
+    op.execute("ALTER SEQUENCE log_error_id_seq RENAME TO log_error_partitioned_id_seq")
+    op.create_table(
+        'log_error',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('timestamp', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('level', sa.String(length=20), server_default='ERROR'),
+        sa.Column('traceback', sa.Text(), nullable=True),
+    )
+    op.execute("""
+        INSERT INTO log_error (id, timestamp, message, level, traceback)
+        SELECT id, timestamp, message, level, traceback FROM log_error_partitioned
+    """)
+    op.execute("SELECT setval(pg_get_serial_sequence('log_error', 'id'), COALESCE((SELECT MAX(id) FROM log_error), 0) + 1, false)")
+    # Semua partisi ikut terhapus bersama tabel induknya
+    op.execute("DROP TABLE log_error_partitioned CASCADE")
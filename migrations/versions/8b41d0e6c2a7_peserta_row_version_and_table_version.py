@@ -0,0 +1,35 @@
+"""peserta row version and table_version
+
+Revision ID: 8b41d0e6c2a7
+Revises: 3f2a9c1d7e01
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b41d0e6c2a7'
+down_revision = '3f2a9c1d7e01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('peserta', sa.Column('updated_at', sa.DateTime(), nullable=True,
+                                       server_default=sa.text('CURRENT_TIMESTAMP')))
+    op.add_column('peserta', sa.Column('row_version', sa.Integer(), nullable=False, server_default='1'))
+
+    op.create_table(
+        'table_version',
+        sa.Column('table_name', sa.String(length=50), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.execute("INSERT INTO table_version (table_name, version) VALUES ('peserta', 0)")
+
+
+def downgrade():
+    op.drop_table('table_version')
+    op.drop_column('peserta', 'row_version')
+    op.drop_column('peserta', 'updated_at')
@@ -0,0 +1,58 @@
+"""report summary tables and peserta.timestamp_approval
+
+Revision ID: a4c6e8f0b2d3
+Revises: f3a5c7e9b1d2
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c6e8f0b2d3'
+down_revision = 'f3a5c7e9b1d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Waktu approval lama tidak diketahui; lag approval hanya dihitung untuk approval setelah migrasi ini
+    op.add_column('peserta', sa.Column('timestamp_approval', sa.DateTime(), nullable=True))
+    op.create_index('ix_peserta_timestamp_registrasi', 'peserta', ['timestamp_registrasi'])
+    op.create_index('ix_peserta_updated_at', 'peserta', ['updated_at'])
+
+    op.create_table(
+        'report_check_in_hourly',
+        sa.Column('session_id', sa.String(length=50), primary_key=True),
+        sa.Column('bucket', sa.DateTime(), primary_key=True),
+        sa.Column('check_ins', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'report_registration_daily',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('registrations', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('pending', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('approved', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('rejected', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('attended', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('approval_lag_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('approval_lag_seconds_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('approval_lag_seconds_max', sa.Float(), nullable=True),
+    )
+    op.create_table(
+        'report_refresh_state',
+        sa.Column('report_name', sa.String(length=50), primary_key=True),
+        sa.Column('watermark_id', sa.BigInteger(), nullable=True),
+        sa.Column('watermark_at', sa.DateTime(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('report_refresh_state')
+    op.drop_table('report_registration_daily')
+    op.drop_table('report_check_in_hourly')
+    op.drop_index('ix_peserta_updated_at', table_name='peserta')
+    op.drop_index('ix_peserta_timestamp_registrasi', table_name='peserta')
+    op.drop_column('peserta', 'timestamp_approval')
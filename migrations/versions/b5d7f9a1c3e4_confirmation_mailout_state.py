@@ -0,0 +1,40 @@
+"""peserta.confirmation_sent_at and stored QR images
+
+Revision ID: b5d7f9a1c3e4
+Revises: a4c6e8f0b2d3
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d7f9a1c3e4'
+down_revision = 'a4c6e8f0b2d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('peserta', sa.Column('confirmation_sent_at', sa.DateTime(), nullable=True))
+    # Peserta yang sudah 'registered' sudah menerima email saat di-approve; mailout berikutnya tidak mengirim ulang
+    # kecuali diminta (resend)
+    op.execute("UPDATE peserta SET confirmation_sent_at = COALESCE(timestamp_approval, updated_at, now()) "
+               "WHERE status_pendaftaran = 'registered'")
+    op.create_index('ix_peserta_confirmation_pending', 'peserta', ['id'],
+                    postgresql_where=sa.text("status_pendaftaran = 'registered' AND confirmation_sent_at IS NULL"))
+
+    op.create_table(
+        'peserta_qr_image',
+        sa.Column('peserta_id', sa.String(length=36), sa.ForeignKey('peserta.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('qr_code_data', sa.String(length=255), nullable=False),
+        sa.Column('png', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('peserta_qr_image')
+    op.drop_index('ix_peserta_confirmation_pending', table_name='peserta')
+    op.drop_column('peserta', 'confirmation_sent_at')
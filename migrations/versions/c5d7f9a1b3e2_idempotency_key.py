@@ -0,0 +1,34 @@
+"""idempotency_key table
+
+Revision ID: c5d7f9a1b3e2
+Revises: 8b41d0e6c2a7
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7f9a1b3e2'
+down_revision = '8b41d0e6c2a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'idempotency_key',
+        sa.Column('key_hash', sa.String(length=64), primary_key=True),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('status_code', sa.SmallInteger(), nullable=True),
+        sa.Column('content_type', sa.String(length=100), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_idempotency_key_expires_at', 'idempotency_key', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_key_expires_at', table_name='idempotency_key')
+    op.drop_table('idempotency_key')
@@ -0,0 +1,24 @@
+"""peserta.confirmation_claimed_at (lease mailout konfirmasi)
+
+Revision ID: c7e9b1d3f5a6
+Revises: b5d7f9a1c3e4
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e9b1d3f5a6'
+down_revision = 'b5d7f9a1c3e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('peserta', sa.Column('confirmation_claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('peserta', 'confirmation_claimed_at')
@@ -0,0 +1,58 @@
+"""attendance_event log and per-session rollup
+
+Revision ID: d2e4a6c8f0b1
+Revises: c5d7f9a1b3e2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e4a6c8f0b1'
+down_revision = 'c5d7f9a1b3e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'attendance_event',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('peserta_id', sa.String(length=36), sa.ForeignKey('peserta.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('session_id', sa.String(length=50), nullable=False),
+        sa.Column('scanner', sa.String(length=100), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('peserta_id', 'session_id', name='uq_attendance_event_peserta_session'),
+    )
+    op.create_index('ix_attendance_event_session_timestamp', 'attendance_event', ['session_id', 'timestamp'])
+
+    op.create_table(
+        'attendance_session_rollup',
+        sa.Column('session_id', sa.String(length=50), primary_key=True),
+        sa.Column('total_check_ins', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('first_check_in', sa.DateTime(), nullable=True),
+        sa.Column('last_check_in', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+
+    # Check-in lama (kolom status_kehadiran) dipindahkan ke sesi default 'main'
+    op.execute("""
+        INSERT INTO attendance_event (peserta_id, session_id, scanner, timestamp)
+        SELECT id, 'main', 'migration', COALESCE(timestamp_kehadiran, CURRENT_TIMESTAMP)
+        FROM peserta
+        WHERE status_kehadiran
+    """)
+    op.execute("""
+        INSERT INTO attendance_session_rollup (session_id, total_check_ins, first_check_in, last_check_in)
+        SELECT session_id, COUNT(*), MIN(timestamp), MAX(timestamp)
+        FROM attendance_event
+        GROUP BY session_id
+    """)
+
+
+def downgrade():
+    op.drop_table('attendance_session_rollup')
+    op.drop_index('ix_attendance_event_session_timestamp', table_name='attendance_event')
+    op.drop_table('attendance_event')
@@ -0,0 +1,31 @@
+"""peserta form answers as JSONB with GIN index
+
+Revision ID: e7f1b3d5a9c4
+Revises: d2e4a6c8f0b1
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f1b3d5a9c4'
+down_revision = 'd2e4a6c8f0b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Database yang dibuat dari model lama memakai tipe JSON; init_db.sql sudah JSONB (no-op)
+    op.alter_column('peserta', 'data_mentah_google_forms',
+                    type_=postgresql.JSONB(), postgresql_using='data_mentah_google_forms::jsonb')
+    op.create_index('ix_peserta_form_answers_gin', 'peserta', ['data_mentah_google_forms'],
+                    postgresql_using='gin', postgresql_ops={'data_mentah_google_forms': 'jsonb_path_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_peserta_form_answers_gin', table_name='peserta')
+    op.alter_column('peserta', 'data_mentah_google_forms',
+                    type_=sa.JSON(), postgresql_using='data_mentah_google_forms::json')
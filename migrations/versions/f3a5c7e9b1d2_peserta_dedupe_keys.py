@@ -0,0 +1,52 @@
+"""peserta dedupe keys and duplicate_candidate
+
+Revision ID: f3a5c7e9b1d2
+Revises: e7f1b3d5a9c4
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a5c7e9b1d2'
+down_revision = 'e7f1b3d5a9c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Kolom dibiarkan NULL; `flask dedupe scan` mengisinya per batch (normalisasi dilakukan di Python)
+    op.add_column('peserta', sa.Column('email_key', sa.String(length=100), nullable=True))
+    op.add_column('peserta', sa.Column('phone_key', sa.String(length=20), nullable=True))
+    op.add_column('peserta', sa.Column('nama_key', sa.String(length=100), nullable=True))
+    op.create_index('ix_peserta_email_key', 'peserta', ['email_key'])
+    op.create_index('ix_peserta_phone_key', 'peserta', ['phone_key'])
+    op.create_index('ix_peserta_nama_key', 'peserta', ['nama_key'])
+
+    op.create_table(
+        'duplicate_candidate',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('peserta_a_id', sa.String(length=36), sa.ForeignKey('peserta.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('peserta_b_id', sa.String(length=36), sa.ForeignKey('peserta.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('reasons', sa.String(length=50), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='open'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.UniqueConstraint('peserta_a_id', 'peserta_b_id', name='uq_duplicate_candidate_pair'),
+    )
+    op.create_index('ix_duplicate_candidate_peserta_b_id', 'duplicate_candidate', ['peserta_b_id'])
+    op.create_index('ix_duplicate_candidate_status_score', 'duplicate_candidate', ['status', 'score'])
+
+
+def downgrade():
+    op.drop_index('ix_duplicate_candidate_status_score', table_name='duplicate_candidate')
+    op.drop_index('ix_duplicate_candidate_peserta_b_id', table_name='duplicate_candidate')
+    op.drop_table('duplicate_candidate')
+    op.drop_index('ix_peserta_nama_key', table_name='peserta')
+    op.drop_index('ix_peserta_phone_key', table_name='peserta')
+    op.drop_index('ix_peserta_email_key', table_name='peserta')
+    op.drop_column('peserta', 'nama_key')
+    op.drop_column('peserta', 'phone_key')
+    op.drop_column('peserta', 'email_key')
@@ -0,0 +1,73 @@
+"""
+Benchmark waktu startup worker berbasis `python -X importtime`.
+
+    python scripts/startup_benchmark.py [--budget-ms 800] [--top 15] [--database-uri sqlite://]
+
+Menjalankan create_app() di interpreter baru, menjumlahkan waktu import modul tingkat atas,
+menampilkan modul paling lambat, dan keluar dengan kode 1 jika total melebihi budget
+sehingga bisa dipasang sebagai gate di CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SNIPPET = """
+import os
+from config import Config
+if os.environ.get('STARTUP_BENCH_DATABASE_URI'):
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['STARTUP_BENCH_DATABASE_URI']
+from app import create_app
+create_app()
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Mengembalikan list (modul, self_us, cumulative_us, depth) dari output -X importtime.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('STARTUP_IMPORT_BUDGET_MS') or 800))
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--database-uri', default=None,
+                        help='Override SQLALCHEMY_DATABASE_URI (mis. sqlite:// jika driver Postgres tidak terpasang).')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.database_uri:
+        env['STARTUP_BENCH_DATABASE_URI'] = args.database_uri
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', SNIPPET],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr[-4000:], file=sys.stderr)
+        return proc.returncode
+
+    entries = parse_importtime(proc.stderr)
+    total_ms = sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_us, cumulative_us, depth in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f}  {self_us / 1000:8.1f}  {'  ' * depth}{name}")
+    print(f"\nTotal import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if total_ms > args.budget_ms:
+        print("Startup import budget exceeded.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
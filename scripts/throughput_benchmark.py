@@ -0,0 +1,77 @@
+"""
+Benchmark throughput HTTP sederhana (tanpa dependensi tambahan).
+
+    python scripts/throughput_benchmark.py --url http://127.0.0.1:8000/peserta/authenticate \
+        --json '{"email": "peserta@example.com"}' --concurrency 32 --duration 20
+
+Menjalankan N thread client yang mengirim request berulang selama durasi tertentu, lalu
+mencetak request/detik, jumlah error, dan latency p50/p95/p99.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def worker(args, body, deadline, latencies, errors, lock):
+    local_latencies = []
+    local_errors = 0
+    while time.perf_counter() < deadline:
+        request = urllib.request.Request(args.url, data=body, method=args.method,
+                                         headers={'Content-Type': 'application/json'} if body else {})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            # Status 4xx tetap dihitung sebagai response yang dilayani server
+            e.read()
+            if e.code >= 500:
+                local_errors += 1
+        except Exception:
+            local_errors += 1
+            continue
+        local_latencies.append(time.perf_counter() - start)
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', required=True)
+    parser.add_argument('--method', default='POST')
+    parser.add_argument('--json', default=None, help='Body JSON untuk setiap request.')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    body = json.dumps(json.loads(args.json)).encode('utf-8') if args.json else None
+    latencies, errors, lock = [], [0], threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=worker, args=(args, body, deadline, latencies, errors, lock))
+               for _ in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests: {len(latencies)}  errors: {errors[0]}  elapsed: {elapsed:.1f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50: {percentile(latencies, 50) * 1000:.1f} ms  "
+          f"p95: {percentile(latencies, 95) * 1000:.1f} ms  p99: {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()